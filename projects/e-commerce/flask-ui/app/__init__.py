@@ -2,11 +2,8 @@ from flask import Flask
 from flask_session import Session
 from config import config
 import os
-from dotenv import main as main_dotenv
 
 def create_app(config_name=None):
-    # from dotenv import main
-    main_dotenv.load_dotenv()
     app = Flask(__name__)
     
     # Set configuration
@@ -17,6 +14,16 @@ def create_app(config_name=None):
     
     Session(app)
     
+    from app.image_urls import init_https_probe
+    from app.catalog import init_catalog
+    init_catalog(app, https_probe=init_https_probe(app))
+    
+    from app.image_proxy import init_image_proxy
+    init_image_proxy(app)
+    
+    from app.events import init_event_emitter
+    init_event_emitter(app)
+    
     from app.routes import main
     app.register_blueprint(main)
     
@@ -0,0 +1,207 @@
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import requests
+from flask import current_app
+
+from .utils import get_nested_category_hierarchy
+
+CATEGORY_COLUMNS = ['product_category_level_1', 'product_category_level_2', 'product_category_level_3']
+
+
+def parse_sku(sku):
+    """SKU as the int stored in the catalog, None when it is not a valid SKU"""
+    try:
+        return int(sku)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_category_index(df):
+    """Map (level1, level2, level3) prefixes (missing levels as None) to sorted row positions"""
+    index = {}
+    for depth in range(1, len(CATEGORY_COLUMNS) + 1):
+        groups = df.groupby(CATEGORY_COLUMNS[:depth], sort=False).indices
+        for key, positions in groups.items():
+            key = key if isinstance(key, tuple) else (key,)
+            index[key + (None,) * (len(CATEGORY_COLUMNS) - depth)] = np.sort(positions)
+    return index
+
+
+# one immutable version of the catalog with its derived structures, swapped as a single reference
+CatalogSnapshot = namedtuple('CatalogSnapshot', ['df', 'hierarchy', 'category_index', 'sku_positions', 'records', 'version'])
+
+EMPTY_SNAPSHOT = CatalogSnapshot(df=None, hierarchy={}, category_index={}, sku_positions={}, records=[], version=None)
+
+
+class Catalog:
+    """
+    Process-wide product catalog, loaded once and refreshed in the background.
+    Readers take `self.snapshot` once per call, so they never mix structures of two catalog versions.
+    """
+
+    def __init__(self, products_path, snapshot_path=None, refresh_interval=0, https_probe=None):
+        self.products_path = products_path
+        self.https_probe = https_probe
+        self.snapshot_path = snapshot_path
+        self.refresh_interval = refresh_interval
+        self.snapshot = EMPTY_SNAPSHOT
+        self._thread = None
+
+    @property
+    def df(self):
+        return self.snapshot.df
+
+    @property
+    def hierarchy(self):
+        return self.snapshot.hierarchy
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+    def load(self):
+        """Load the catalog, from the local snapshot when there is one"""
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            try:
+                self._set(pd.read_parquet(self.snapshot_path), version=self._read_snapshot_version())
+                print(f"Catalog loaded from snapshot {self.snapshot_path} (version {self.version})")
+                return
+            except Exception as e:
+                print(f"Error reading catalog snapshot: {e}")
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        """Reload the catalog from the source if its version (ETag / mtime) changed"""
+        version = self._source_version()
+        if not force and version is not None and version == self.version:
+            return False
+        df = pd.read_csv(self.products_path, lineterminator='\n')
+        self._set(df, version)
+        self._write_snapshot(df, version)
+        print(f"Catalog loaded from {self.products_path} ({len(df)} products)")
+        return True
+
+    def start_background_refresh(self):
+        """Periodically refresh the catalog in a daemon thread"""
+        if self.refresh_interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._refresh_loop, name='catalog-refresh', daemon=True)
+        self._thread.start()
+
+    def _refresh_loop(self):
+        # check the source right away, a catalog restored from the snapshot is only
+        # downloaded again when the source version differs from the snapshot one
+        self._safe_refresh()
+        while True:
+            time.sleep(self.refresh_interval)
+            self._safe_refresh()
+
+    def _safe_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Error refreshing catalog: {e}")
+
+    def get_category_products(self, level1=None, level2=None, level3=None, limit=None):
+        """Products of a category, in catalog order, without scanning the catalog"""
+        snapshot = self.snapshot
+        if not level1:
+            return snapshot.df.iloc[:limit]
+        key = (level1, level2 or None, (level3 or None) if level2 else None)
+        positions = snapshot.category_index.get(key, np.empty(0, dtype=np.intp))
+        return snapshot.df.iloc[positions[:limit]]
+
+    def get_product(self, sku):
+        """Product dict of a SKU, None when the SKU is unknown"""
+        snapshot = self.snapshot
+        position = snapshot.sku_positions.get(parse_sku(sku))
+        return None if position is None else dict(snapshot.records[position])
+
+    def get_products_by_skus(self, skus):
+        """Product dicts of SKUs in the given order, unknown SKUs are skipped"""
+        snapshot = self.snapshot
+        positions = (snapshot.sku_positions.get(parse_sku(sku)) for sku in skus)
+        # shallow copies, callers add per-request fields (e.g. image) to the product dicts
+        return [dict(snapshot.records[position]) for position in positions if position is not None]
+
+    def _set(self, df, version):
+        # derived structures are built before swapping the snapshot, readers never see a partial catalog
+        if self.https_probe is not None and 'product_image' in df.columns:
+            df = df.assign(product_image=self.https_probe.rewrite_urls(df['product_image']))
+        hierarchy = get_nested_category_hierarchy(df)
+        category_index = build_category_index(df)
+        records = df.to_dict('records')
+        sku_positions = {}
+        for position, sku in enumerate(df['sku']):
+            # first occurrence wins, as with the previous row filtering
+            sku_positions.setdefault(parse_sku(sku), position)
+        self.snapshot = CatalogSnapshot(
+            df=df,
+            hierarchy=hierarchy,
+            category_index=category_index,
+            sku_positions=sku_positions,
+            records=records,
+            version=version,
+        )
+
+    def _source_version(self):
+        try:
+            if self.products_path.startswith(('http://', 'https://')):
+                response = requests.head(self.products_path, timeout=5)
+                response.raise_for_status()
+                return response.headers.get('ETag') or response.headers.get('Last-Modified')
+            return str(os.path.getmtime(self.products_path))
+        except Exception as e:
+            print(f"Error checking catalog version: {e}")
+            return None
+
+    def _read_snapshot_version(self):
+        """Source version (ETag / mtime) the snapshot was written from, None when unknown or of another source"""
+        try:
+            with open(f'{self.snapshot_path}.version') as f:
+                data = json.load(f)
+            return data['version'] if data.get('source') == self.products_path else None
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading catalog snapshot version: {e}")
+            return None
+
+    def _write_snapshot(self, df, version):
+        if not self.snapshot_path:
+            return
+        try:
+            tmp_path = f'{self.snapshot_path}.{os.getpid()}.tmp'
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.snapshot_path)
+            # written after the parquet file, a crash in between only leaves an older version (one extra download)
+            with open(tmp_path, 'w') as f:
+                json.dump({'source': self.products_path, 'version': version}, f)
+            os.replace(tmp_path, f'{self.snapshot_path}.version')
+        except Exception as e:
+            print(f"Error writing catalog snapshot: {e}")
+
+
+def init_catalog(app, https_probe=None):
+    """Create the app catalog, load it and start the background refresh"""
+    catalog = Catalog(
+        app.config['PRODUCTS_GCS_PATH'],
+        snapshot_path=app.config['CATALOG_SNAPSHOT_PATH'],
+        refresh_interval=app.config['CATALOG_REFRESH_INTERVAL'],
+        https_probe=https_probe,
+    )
+    catalog.load()
+    catalog.start_background_refresh()
+    app.extensions['catalog'] = catalog
+    return catalog
+
+
+def get_catalog():
+    """Catalog of the current app"""
+    return current_app.extensions['catalog']
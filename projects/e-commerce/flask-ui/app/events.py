@@ -0,0 +1,110 @@
+import atexit
+import queue
+import threading
+import time
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+
+class EventEmitter:
+    """
+    Sends user events to the wrapper from a background thread, in batches over a pooled session.
+    Events are dropped (and counted) when the bounded queue is full, pending events are flushed at exit.
+    """
+
+    def __init__(self, base_url, max_queue_size=10000, batch_size=50, flush_interval=0.5, timeout=5):
+        self.url = f'{base_url}/api/ingest/events'
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.counters = {'queued': 0, 'dropped': 0, 'sent': 0, 'failed': 0, 'batches': 0}
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self._closing = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def emit(self, event):
+        """Queue an event without blocking, returns False when it was dropped"""
+        if self._closing.is_set():
+            self.counters['dropped'] += 1
+            return False
+        # the worker is started lazily, so it belongs to the process serving requests (e.g. a gunicorn worker)
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.counters['dropped'] += 1
+            return False
+        self.counters['queued'] += 1
+        return True
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-emitter', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not (self._closing.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._send(batch)
+
+    def _next_batch(self):
+        """Collect up to `batch_size` events, waiting at most `flush_interval` seconds"""
+        batch = []
+        flush_at = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = flush_at - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _send(self, batch):
+        self.counters['batches'] += 1
+        try:
+            response = self.session.post(self.url, json=batch, timeout=self.timeout)
+            response.raise_for_status()
+            self.counters['sent'] += len(batch)
+        except Exception as e:
+            self.counters['failed'] += len(batch)
+            print(f"Error sending {len(batch)} events: {e}")
+
+    def stop(self, timeout=10):
+        """Stop accepting events and flush the queued ones"""
+        self._closing.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        print(f"Event emitter stopped: {self.stats()}")
+
+    def stats(self):
+        return {**self.counters, 'pending': self.queue.qsize()}
+
+
+def init_event_emitter(app):
+    """Create the app event emitter, flushed when the process exits"""
+    event_emitter = EventEmitter(
+        app.config['API_BASE_URL'],
+        max_queue_size=app.config['EVENT_QUEUE_SIZE'],
+        batch_size=app.config['EVENT_BATCH_SIZE'],
+        flush_interval=app.config['EVENT_FLUSH_INTERVAL'],
+    )
+    atexit.register(event_emitter.stop)
+    app.extensions['event_emitter'] = event_emitter
+    return event_emitter
+
+
+def get_event_emitter():
+    """Event emitter of the current app"""
+    return current_app.extensions['event_emitter']
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import requests
+from flask import current_app
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+MAX_THUMBNAIL_WIDTH = 1024
+
+
+class ImageProxy:
+    """
+    Fetches external images through a pooled session and keeps them in a size-capped on-disk LRU cache.
+    Entries are keyed by the sha256 of the URL (and thumbnail width), their ETag is the sha256 of the content.
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024, timeout=5, max_age=86400,
+                 max_image_bytes=10 * 1024 * 1024, pool_size=20):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.max_age = max_age
+        self.max_image_bytes = max_image_bytes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def get(self, url, width=None):
+        """Image (body, content type, etag) of a URL, optionally resized to `width` pixels wide"""
+        if width:
+            width = min(int(width), MAX_THUMBNAIL_WIDTH)
+        key = hashlib.sha256(f'{url}|{width or ""}'.encode()).hexdigest()
+        cached = self._read(key)
+        if cached is not None:
+            return cached
+        if width:
+            body, content_type, _ = self.get(url)
+            body, content_type = make_thumbnail(body, content_type, width)
+        else:
+            body, content_type = self._fetch(url)
+        etag = f'"{hashlib.sha256(body).hexdigest()}"'
+        self._write(key, body, {'content_type': content_type, 'etag': etag})
+        return body, content_type, etag
+
+    def _fetch(self, url):
+        with self.session.get(url, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            chunks, size = [], 0
+            for chunk in response.iter_content(chunk_size=8192):
+                size += len(chunk)
+                if size > self.max_image_bytes:
+                    raise ValueError(f"Image larger than {self.max_image_bytes} bytes: {url}")
+                chunks.append(chunk)
+            return b''.join(chunks), response.headers.get('Content-Type', 'application/octet-stream')
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base, f'{base}.json'
+
+    def _read(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(data_path, 'rb') as f:
+                body = f.read()
+            os.utime(data_path)
+            return body, meta['content_type'], meta['etag']
+        except Exception as e:
+            print(f"Error reading cached image {key}: {e}")
+            self._forget(key)
+            return None
+
+    def _write(self, key, body, meta):
+        if len(body) > self.max_bytes:
+            return
+        data_path, meta_path = self._paths(key)
+        try:
+            os.makedirs(os.path.dirname(data_path), exist_ok=True)
+            tmp_suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(data_path + tmp_suffix, 'wb') as f:
+                f.write(body)
+            with open(meta_path + tmp_suffix, 'w') as f:
+                json.dump(meta, f)
+            os.replace(meta_path + tmp_suffix, meta_path)
+            os.replace(data_path + tmp_suffix, data_path)
+        except Exception as e:
+            print(f"Error caching image {key}: {e}")
+            return
+        with self._lock:
+            self._size += len(body) - self._entries.pop(key, 0)
+            self._entries[key] = len(body)
+            evicted = []
+            while self._size > self.max_bytes and self._entries:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._size -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            self._remove_files(old_key)
+
+    def _forget(self, key):
+        with self._lock:
+            self._size -= self._entries.pop(key, 0)
+        self._remove_files(key)
+
+    def _remove_files(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _load_index(self):
+        """Rebuild the LRU order of the cached images from their last access times"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if '.' in name:
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                entries.append((stat.st_mtime, name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._size += size
+        print(f"Image cache loaded ({len(self._entries)} images, {self._size} bytes)")
+
+    def stats(self):
+        return {'images': len(self._entries), 'bytes': self._size, 'max_bytes': self.max_bytes}
+
+
+def make_thumbnail(body, content_type, width):
+    """Resize an image to at most `width` pixels wide, keeping its aspect ratio and format"""
+    image = Image.open(BytesIO(body))
+    image_format = image.format or 'PNG'
+    if image.width <= width:
+        return body, content_type
+    image.thumbnail((width, image.height * width // image.width))
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    output = BytesIO()
+    image.save(output, format=image_format)
+    return output.getvalue(), Image.MIME.get(image_format, content_type)
+
+
+def init_image_proxy(app):
+    """Create the app image proxy on top of its on-disk cache"""
+    image_proxy = ImageProxy(
+        app.config['IMAGE_CACHE_DIR'],
+        max_bytes=app.config['IMAGE_CACHE_MAX_BYTES'],
+        timeout=app.config['IMAGE_PROXY_TIMEOUT'],
+        max_age=app.config['IMAGE_CACHE_MAX_AGE'],
+    )
+    app.extensions['image_proxy'] = image_proxy
+    return image_proxy
+
+
+def get_image_proxy():
+    """Image proxy of the current app"""
+    return current_app.extensions['image_proxy']
@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from flask import current_app
+
+
+def to_https(url):
+    return 'https://' + url[len('http://'):]
+
+
+class HttpsProbeCache:
+    """
+    Remembers which image hosts (and URLs) serve their http:// images over HTTPS.
+    A host result is only recorded once `host_samples` probed URLs of the host agree (by majority),
+    a missing image or a timeout never marks a whole host as not serving HTTPS.
+    Results expire after `ttl` seconds and are optionally persisted to a JSON file.
+    Probes run in a thread pool, never on the request path.
+    """
+
+    def __init__(self, path=None, ttl=86400, max_workers=8, timeout=3, host_samples=3):
+        self.path = path
+        self.ttl = ttl
+        self.timeout = timeout
+        self.host_samples = host_samples
+        self.hosts = {}
+        self.urls = {}
+        # host -> [https ok votes, https failed votes] of the probes since its last result
+        self._votes = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='https-probe')
+
+    def lookup(self, url):
+        """True / False when the HTTPS capability of the URL (or its host) is known, None otherwise"""
+        now = time.time()
+        for cache, key in ((self.urls, url), (self.hosts, urlparse(url).netloc)):
+            entry = cache.get(key)
+            if entry is not None and entry[1] + self.ttl > now:
+                return entry[0]
+        return None
+
+    def _check(self, url):
+        """
+        (url_ok, host_vote) of the https:// version of an http:// URL.
+        Only a 200 or a TLS / connection failure says something about the host, e.g. a 404 is one missing image.
+        Timeouts are inconclusive for both, (None, None).
+        """
+        try:
+            status_code = self._session.head(to_https(url), timeout=self.timeout).status_code
+        except requests.Timeout:
+            return None, None
+        except (requests.exceptions.SSLError, requests.ConnectionError):
+            return False, False
+        except Exception:
+            return None, None
+        if status_code == 200:
+            return True, True
+        return False, None
+
+    def probe(self, url):
+        """Check the https:// version of an http:// URL, record the URL result and vote for its host"""
+        url_ok, host_vote = self._check(url)
+        now = time.time()
+        host = urlparse(url).netloc
+        with self._lock:
+            self._pending.discard(url)
+            if url_ok is not None:
+                self.urls[url] = (url_ok, now)
+            host_entry = self.hosts.get(host)
+            if host_vote is None or (host_entry is not None and host_entry[1] + self.ttl > now):
+                return url_ok
+            votes = self._votes.setdefault(host, [0, 0])
+            votes[0 if host_vote else 1] += 1
+            if sum(votes) >= self.host_samples:
+                self.hosts[host] = (votes[0] > votes[1], now)
+                del self._votes[host]
+        return url_ok
+
+    def probe_later(self, url):
+        """Schedule a background probe of the URL, at most one at a time per URL"""
+        with self._lock:
+            if url in self._pending:
+                return
+            self._pending.add(url)
+        self._executor.submit(self.probe, url).add_done_callback(lambda _: self.save())
+
+    def rewrite_urls(self, urls):
+        """
+        Rewrite http:// URLs to https:// where their host is HTTPS capable.
+        Hosts without a fresh result are probed concurrently with up to `host_samples` distinct URLs each,
+        hosts that answered but are still undecided (e.g. missing images) get a second round.
+        URLs of undecided hosts are only rewritten on their own URL result.
+        """
+        urls = list(urls)
+        candidates = {}
+        for url in urls:
+            if isinstance(url, str) and url.startswith('http://') and self.lookup(url) is None:
+                candidates.setdefault(urlparse(url).netloc, []).append(url)
+        hosts = list(candidates)
+        for _ in range(2):
+            samples = []
+            for host in hosts:
+                needed = self.host_samples - sum(self._votes.get(host, ()))
+                samples.extend(candidates[host][:needed])
+                del candidates[host][:needed]
+            if not samples:
+                break
+            list(self._executor.map(self.probe, samples))
+            hosts = [host for host in hosts if host not in self.hosts and host in self._votes and candidates[host]]
+        if candidates:
+            self.save()
+            print(f"Probed HTTPS support of {len(candidates)} image hosts")
+        return [
+            to_https(url) if isinstance(url, str) and url.startswith('http://') and self.lookup(url) else url
+            for url in urls
+        ]
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.hosts.update({host: tuple(entry) for host, entry in data.get('hosts', {}).items()})
+            self.urls.update({url: tuple(entry) for url, entry in data.get('urls', {}).items()})
+        except Exception as e:
+            print(f"Error reading HTTPS probe cache: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                data = {'hosts': dict(self.hosts), 'urls': dict(self.urls)}
+            tmp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error writing HTTPS probe cache: {e}")
+
+
+def init_https_probe(app):
+    """Create the app HTTPS probe cache and load its persisted results"""
+    https_probe = HttpsProbeCache(
+        path=app.config['IMAGE_PROBE_CACHE_PATH'],
+        ttl=app.config['IMAGE_PROBE_TTL'],
+        max_workers=app.config['IMAGE_PROBE_WORKERS'],
+        timeout=app.config['IMAGE_PROBE_TIMEOUT'],
+        host_samples=app.config['IMAGE_PROBE_HOST_SAMPLES'],
+    )
+    https_probe.load()
+    app.extensions['https_probe'] = https_probe
+    return https_probe
+
+
+def get_https_probe():
+    """HTTPS probe cache of the current app"""
+    return current_app.extensions['https_probe']
@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template, redirect, url_for, session
 from .utils import *
+from .catalog import get_catalog
+from .image_proxy import get_image_proxy
 
 from flask import send_file
 import os
@@ -11,7 +13,7 @@ from flask import jsonify
 import requests
 from io import BytesIO
 from PIL import Image, ImageDraw
-from flask import Blueprint, render_template, redirect, url_for, session, make_response
+from flask import Blueprint, render_template, redirect, url_for, session, make_response, abort
 from functools import wraps
 
 
@@ -30,8 +32,7 @@ def no_cache(view):
 @main.route('/')
 def index():
     """Landing page with start session button"""
-    df = load_products_from_gcs()
-    hierarchy = get_nested_category_hierarchy(df)
+    hierarchy = get_catalog().hierarchy
     return render_template('index.html',
                          hierarchy=hierarchy,
                          current_level1=None,
@@ -49,17 +50,16 @@ def home():
     if 'user_id' not in session:
         return redirect(url_for('main.index'))
     
-    df = load_products_from_gcs()
     # Get personalized recommendations
     recommended_products = get_recommendations('user_recommendations', 
                                             user_id=session['user_id'], limit=30)
-    products = get_products_by_skus(df, recommended_products).to_dict('records')
+    products = get_catalog().get_products_by_skus(recommended_products)
     
     for product in products:
         if 'product_image' in product:
             product['image'] = process_image_url(product['product_image'])
     
-    hierarchy  = get_nested_category_hierarchy(df)
+    hierarchy  = get_catalog().hierarchy
     
     return render_template('home.html', 
                          products=products,
@@ -81,9 +81,9 @@ def category(category_path):
     level2 = levels[1] if len(levels) > 1 else None
     level3 = levels[2] if len(levels) > 2 else None
     
-    df = load_products_from_gcs()
-    hierarchy = get_nested_category_hierarchy(df)
-    products = get_filtered_products(df, level1, level2, level3)
+    catalog = get_catalog()
+    hierarchy = catalog.hierarchy
+    products = catalog.get_category_products(level1, level2, level3, limit=500)
     
     # Process image URLs
     products_list = products.to_dict('records')
@@ -92,7 +92,7 @@ def category(category_path):
             product['product_image'] = process_image_url(product['product_image'])
     
     return render_template('category.html',
-                         products=products_list[:500],
+                         products=products_list,
                          hierarchy=hierarchy,
                          current_level1=level1,
                          current_level2=level2,
@@ -105,24 +105,27 @@ def product(sku):
     if 'user_id' not in session:
         return redirect(url_for('main.index'))
     
-    df = load_products_from_gcs()
-    product = df[df['sku'] == int(sku)].iloc[0].to_dict()
-    hierarchy = get_nested_category_hierarchy(df)
+    catalog = get_catalog()
+    product = catalog.get_product(sku)
+    if product is None:
+        abort(404)
+    hierarchy = catalog.hierarchy
 
     # Fire product view event
     fire_event(session['user_id'], sku, 'product_viewed')
 
-    # Get recommendations
-    similar_products = get_recommendations('item_similarity', item_id=sku, limit=20)
-    complementary_by_users = get_recommendations('item_users_similarity', item_id=sku, limit=20)
-    complementary_category = get_recommendations('item_complement_topic', item_id=sku, limit=20)
-    popular_for_item = get_recommendations('item_popularity', item_id=sku, limit=20)
+    # Get recommendations, all strategies are computed by the wrapper in one call
+    strategies = {
+        'similar': 'item_similarity',
+        'complementary_by_users': 'item_users_similarity',
+        'complementary_category': 'item_complement_topic',
+        'popular_for_item': 'item_popularity',
+    }
+    item_recommendations = get_item_recommendations(sku, list(strategies.values()), limit=20)
 
     recommendations = {
-        'similar': get_products_by_skus(df, similar_products).to_dict('records'),
-        'complementary_by_users': get_products_by_skus(df, complementary_by_users).to_dict('records'),
-        'complementary_category': get_products_by_skus(df, complementary_category).to_dict('records'),
-        'popular_for_item': get_products_by_skus(df, popular_for_item).to_dict('records')
+        section: catalog.get_products_by_skus(item_recommendations.get(strategy, []))
+        for section, strategy in strategies.items()
     }
 
     return render_template('product.html', 
@@ -139,7 +142,10 @@ def add_to_cart(sku):
     """Handle add to cart event"""
     if 'user_id' not in session:
         return jsonify({'error': 'No session'}), 401
-    
+
+    if get_catalog().get_product(sku) is None:
+        return jsonify({'error': 'Unknown product'}), 404
+
     fire_event(session['user_id'], sku, 'product_added')
     return jsonify({'success': True})
 
@@ -170,24 +176,28 @@ def placeholder_image():
 
 @main.route('/proxy-image')
 def proxy_image():
-    """Proxy for external HTTP images"""
+    """Proxy for external HTTP images, served from the local image cache"""
     url = request.args.get('url')
     if not url:
         return 'No URL provided', 400
+    if not url.startswith(('http://', 'https://')):
+        return 'Invalid URL', 400
+    width = request.args.get('width', type=int)
+    if width is not None and width <= 0:
+        return 'Invalid width', 400
         
+    image_proxy = get_image_proxy()
     try:
-        # Fetch the image
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        # Create a response with the image content
-        return Response(
-            response.iter_content(chunk_size=8192),
-            content_type=response.headers['Content-Type']
-        )
+        body, content_type, etag = image_proxy.get(url, width=width)
     except Exception as e:
         return str(e), 500
 
+    headers = {'ETag': etag, 'Cache-Control': f'public, max-age={image_proxy.max_age}'}
+    if etag in request.headers.get('If-None-Match', ''):
+        return Response(status=304, headers=headers)
+    # Content-Length is set from the body
+    return Response(body, content_type=content_type, headers=headers)
+
 @main.route('/reset-session')
 def reset_session():
     """Reset session and return to landing page"""
@@ -205,14 +215,13 @@ def search():
     if not query:
         return redirect(url_for('main.home'))
     try:
-        df = load_products_from_gcs()
         search_similar = get_recommendations('nlq2item', query=query, limit=100)
-        products = get_products_by_skus(df, search_similar).to_dict('records')
+        products = get_catalog().get_products_by_skus(search_similar)
         
         return render_template('search_results.html',
                              products=products,
                              query=query,
-                             hierarchy=get_nested_category_hierarchy(df))
+                             hierarchy=get_catalog().hierarchy)
                              
     except Exception as e:
         print(f"Search error: {e}")
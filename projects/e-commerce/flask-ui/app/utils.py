@@ -12,23 +12,10 @@ from flask import current_app
 from dotenv import main as main_dotenv
 import os
 
-def load_products_from_gcs():
-    main_dotenv.load_dotenv()
-    # products_path = current_app.config['PRODUCTS_GCS_PATH']
-    products_path = os.getenv('GCS_PRODUCTS_PATH')
-    df = pd.read_csv(products_path, lineterminator='\n')
-    return df
-
 def get_random_products(df, n=20):
     """Get n random products from DataFrame"""
     return df.sample(n=min(n, len(df)))
 
-def get_products_by_skus(df, skus):
-    """Get products by list of SKUs and keep order"""
-    skus = [int(sku) for sku in skus]
-    return df[df['sku'].isin(skus)].set_index('sku').loc[skus].reset_index()
-    
-
 def get_products_by_category(df, level, category):
     """Get products filtered by category level"""
     return df[df[f'product_category_level_{level}'] == category]
@@ -56,17 +43,17 @@ def process_image_url(url):
     if url.startswith('https://'):
         return url
         
-    # If it's HTTP, try HTTPS version first
+    # If it's HTTP, use the HTTPS version when it is known to work
     if url.startswith('http://'):
-        https_url = 'https://' + url[7:]
-        try:
-            response = requests.head(https_url, timeout=1)
-            if response.status_code == 200:
-                return https_url
-        except:
-            pass
+        from .image_urls import get_https_probe, to_https
+        https_probe = get_https_probe()
+        https_ok = https_probe.lookup(url)
+        if https_ok:
+            return to_https(url)
+        if https_ok is None:
+            https_probe.probe_later(url)
         
-        # If HTTPS not available, proxy through our server
+        # If HTTPS is not (yet) known to be available, proxy through our server
         return url_for('main.proxy_image', url=url, _external=True)
         
     return url
@@ -95,22 +82,8 @@ def get_nested_category_hierarchy(df):
     
     return hierarchy
 
-def get_filtered_products(df, level1=None, level2=None, level3=None):
-    """Get products filtered by category hierarchy"""
-    filtered_df = df.copy()
-    
-    if level1:
-        filtered_df = filtered_df[filtered_df['product_category_level_1'] == level1]
-        if level2:
-            filtered_df = filtered_df[filtered_df['product_category_level_2'] == level2]
-            if level3:
-                filtered_df = filtered_df[filtered_df['product_category_level_3'] == level3]
-                
-    return filtered_df
-
-
 def fire_event(user_id, sku, event_type):
-    """Fire an event to the ingest_event endpoint"""
+    """Queue an event for the ingest_events endpoint, sent in the background"""
     event_data = {
         "user": user_id,
         "product": sku,
@@ -118,14 +91,8 @@ def fire_event(user_id, sku, event_type):
         "created_at": int(time.time())
     }
     
-    try:
-        base_url = current_app.config['API_BASE_URL']
-        response = requests.post(f'{base_url}/api/ingest/event', json=event_data)
-        response.raise_for_status()
-        return True
-    except Exception as e:
-        print(f"Error firing event: {e}")
-        return False
+    from .events import get_event_emitter
+    return get_event_emitter().emit(event_data)
 
 def get_recommendations(endpoint, **params):
     """Generic function to fetch recommendations from various endpoints"""
@@ -136,4 +103,16 @@ def get_recommendations(endpoint, **params):
         return [i['id'] for i in response.json()]
     except Exception as e:
         print(f"Error fetching recommendations from {endpoint}: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def get_item_recommendations(item_id, strategies, limit=20):
+    """Fetch several item recommendation strategies in a single call, returns strategy -> list of ids"""
+    try:
+        base_url = current_app.config['API_BASE_URL']
+        params = {'item_id': item_id, 'strategies': ','.join(strategies), 'limit': limit}
+        response = requests.get(f'{base_url}/api/search/item_recommendations', params=params)
+        response.raise_for_status()
+        return {strategy: [i['id'] for i in results] for strategy, results in response.json().items()}
+    except Exception as e:
+        print(f"Error fetching item recommendations for {item_id}: {e}")
+        return {strategy: [] for strategy in strategies}
\ No newline at end of file
@@ -2,6 +2,11 @@
 import os
 from datetime import timedelta
 
+from dotenv import load_dotenv
+
+# app/.env must be loaded before the config classes below read the environment
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', '.env'))
+
 class BaseConfig:
     """Base configuration."""
     # Flask settings
@@ -11,11 +16,30 @@ class BaseConfig:
     
     # Data settings
     PRODUCTS_GCS_PATH = os.environ.get('GCS_PRODUCTS_PATH')
+    # local parquet copy of the catalog for fast warm restarts, and how often (seconds) to check the source for changes
+    CATALOG_SNAPSHOT_PATH = os.environ.get('CATALOG_SNAPSHOT_PATH')
+    CATALOG_REFRESH_INTERVAL = int(os.environ.get('CATALOG_REFRESH_INTERVAL', 300))
+    # where to persist which image hosts serve HTTPS, how long (seconds) results stay valid and how many probes run at once
+    IMAGE_PROBE_CACHE_PATH = os.environ.get('IMAGE_PROBE_CACHE_PATH')
+    IMAGE_PROBE_TTL = int(os.environ.get('IMAGE_PROBE_TTL', 86400))
+    IMAGE_PROBE_WORKERS = int(os.environ.get('IMAGE_PROBE_WORKERS', 8))
+    IMAGE_PROBE_TIMEOUT = float(os.environ.get('IMAGE_PROBE_TIMEOUT', 3))
+    IMAGE_PROBE_HOST_SAMPLES = int(os.environ.get('IMAGE_PROBE_HOST_SAMPLES', 3))
+    # on-disk cache of proxied images: directory, size cap in bytes, origin timeout and browser max-age (seconds)
+    IMAGE_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR', 'image_cache')
+    IMAGE_CACHE_MAX_BYTES = int(os.environ.get('IMAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    IMAGE_PROXY_TIMEOUT = float(os.environ.get('IMAGE_PROXY_TIMEOUT', 5))
+    IMAGE_CACHE_MAX_AGE = int(os.environ.get('IMAGE_CACHE_MAX_AGE', 86400))
     
     # API endpoints configuration
     API_HOST = os.environ.get('API_HOST', 'http://0.0.0.0')
     API_PORT = os.environ.get('API_PORT', '8000')
     API_BASE_URL = f"{API_HOST}:{API_PORT}"
+    
+    # background event sending: queue bound (events beyond it are dropped), batch size and max batching delay (seconds)
+    EVENT_QUEUE_SIZE = int(os.environ.get('EVENT_QUEUE_SIZE', 10000))
+    EVENT_BATCH_SIZE = int(os.environ.get('EVENT_BATCH_SIZE', 50))
+    EVENT_FLUSH_INTERVAL = float(os.environ.get('EVENT_FLUSH_INTERVAL', 0.5))
 
 class DevelopmentConfig(BaseConfig):
     """Development configuration."""
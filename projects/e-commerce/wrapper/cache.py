@@ -0,0 +1,94 @@
+import asyncio
+import time
+from collections import OrderedDict
+from threading import Lock
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries expire `ttl` seconds after being set.
+    Keeps hit/miss counters for monitoring.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class AsyncMemo:
+    """
+    Short-lived memoization of coroutine results.
+    Concurrent callers asking for the same key share one in-flight computation, failures are not cached.
+    """
+
+    def __init__(self, maxsize=1024, ttl=10):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight = {}
+
+    async def get_or_compute(self, key, compute):
+        """Return the memoized value of `key`, awaiting `compute()` to produce it when missing."""
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(compute())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._store(key, done))
+        return await asyncio.shield(future)
+
+    def _store(self, key, future):
+        self._inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.cache.set(key, future.result())
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        return {**self.cache.stats(), "inflight": len(self._inflight)}
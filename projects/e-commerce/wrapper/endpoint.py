@@ -1,12 +1,12 @@
 import os
 import json
+import asyncio
 import logging
 from threading import Lock
 from pathlib import Path
 from io import BytesIO
 import base64
 import uuid
-import random
 from dotenv import main
 from PIL import Image
 from contextlib import asynccontextmanager
@@ -14,10 +14,16 @@ from dataclasses import dataclass, field
 from fastapi import FastAPI, HTTPException
 import uvicorn
 import pandas as pd
-import numpy as np
-import requests
+import httpx
 
-from kv.redis import RedisKV
+from kv.redis_async import AsyncRedisKV
+from item2vec_store import Item2VecStore
+import vectors
+from cache import TTLCache, AsyncMemo
+from popularity import PopularityPool
+from events import EventIngestor
+from known_users import KnownUsers
+from query_templates import QueryTemplate, compile_query_config
 
 # Load environment variables
 main.load_dotenv()
@@ -38,47 +44,163 @@ SL_API_MAP = {
     'nlq2item': f"{BASE_SL_URL}/api/v1/search/nlq2item",
     'data_loader_run': f"{BASE_SL_URL}/data-loader/product_schema/run",
 }
+SL_HEADERS = {"accept": "application/json", "Content-Type": "application/json"}
+SL_POOL_SIZE = int(os.getenv('SL_POOL_SIZE', 100))
+SL_KEEPALIVE_POOL_SIZE = int(os.getenv('SL_KEEPALIVE_POOL_SIZE', 20))
+SL_DEFAULT_TIMEOUT = float(os.getenv('SL_DEFAULT_TIMEOUT', 10))
+# per-endpoint timeouts can be overridden with e.g. SL_TIMEOUT_DATA_LOADER_RUN=60
+SL_TIMEOUT_MAP = {
+    path_name: float(os.getenv(f"SL_TIMEOUT_{path_name.upper()}", SL_DEFAULT_TIMEOUT))
+    for path_name in SL_API_MAP
+}
+ITEM_RECS_CACHE_SIZE = int(os.getenv('ITEM_RECS_CACHE_SIZE', 10000))
+ITEM_RECS_CACHE_TTL = float(os.getenv('ITEM_RECS_CACHE_TTL', 300))
+# short window in which strategies requested for the same item share its vector lookup
+ITEM_VECTOR_MEMO_TTL = float(os.getenv('ITEM_VECTOR_MEMO_TTL', 10))
+POPULARITY_POOL_SIZE = int(os.getenv('POPULARITY_POOL_SIZE', 100))
+POPULARITY_REFRESH_INTERVAL = float(os.getenv('POPULARITY_REFRESH_INTERVAL', 300))
+# max popularity pools re-fetched at once by the background refresh
+POPULARITY_REFRESH_CONCURRENCY = int(os.getenv('POPULARITY_REFRESH_CONCURRENCY', 4))
+# 'sync' ingests events within the request, 'async' acknowledges them and ingests in background micro-batches
+EVENT_INGEST_MODE = os.getenv('EVENT_INGEST_MODE', 'sync')
+EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', 10000))
+EVENT_BATCH_SIZE = int(os.getenv('EVENT_BATCH_SIZE', 50))
+EVENT_FLUSH_INTERVAL = float(os.getenv('EVENT_FLUSH_INTERVAL', 0.5))
+EVENT_PUT_TIMEOUT = float(os.getenv('EVENT_PUT_TIMEOUT', 0.1))
+REDIS_POOL_SIZE = int(os.getenv('REDIS_POOL_SIZE', 50))
+# user_topics_set:{user_id} keeps only the most recent topics and expires after the TTL (seconds)
+USER_TOPICS_MAX = int(os.getenv('USER_TOPICS_MAX', 20))
+USER_TOPICS_TTL = int(os.getenv('USER_TOPICS_TTL', 30 * 24 * 3600))
+# also keep known user topic ids in a Redis set shared between wrapper instances
+KNOWN_USERS_REDIS_SET = os.getenv('KNOWN_USERS_REDIS_SET', 'false').lower() == 'true'
+# total time budget (seconds) for the per-topic user recommendation fan-out, unset means no deadline
+USER_RECS_DEADLINE = float(os.getenv('USER_RECS_DEADLINE', 0)) or None
+
+
+def load_query_config():
+    config_path = __dir__ / "config" / "query_config.json"
+    with open(config_path, 'r') as config_file:
+        return json.load(config_file)
 
 
 @dataclass
 class AppState:
     """Holds the shared application state."""
     lock: Lock = field(default_factory=Lock, init=False)
+    recalc_lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
     products_df: pd.DataFrame = field(default=None, init=False)
     product_id_to_topic: dict = field(default=None, init=False)
     product_id_to_type: dict = field(default=None, init=False)
+    item2vec_store: Item2VecStore = field(default=None, init=False)
+    item_recs_cache: TTLCache = field(default=None, init=False)
+    item_vector_memo: AsyncMemo = field(default=None, init=False)
+    popularity_pool: PopularityPool = field(default=None, init=False)
+    event_ingestor: EventIngestor = field(default=None, init=False)
+    known_users: KnownUsers = field(default=None, init=False)
     logger: logging.Logger = field(default=None, init=False)
-    redis_kv: RedisKV = field(default=None, init=False)
+    redis_kv: AsyncRedisKV = field(default=None, init=False)
     empty_image: str = field(default=None, init=False)
     query_config: dict = field(default=None, init=False)
+    query_templates: dict = field(default=None, init=False)
+    sl_client: httpx.AsyncClient = field(default=None, init=False)
 
     def init(self):
         """Initialize the application state."""
         with self.lock:
             self._setup_logging()
+            self._load_sl_client()
+            self.item_recs_cache = TTLCache(maxsize=ITEM_RECS_CACHE_SIZE, ttl=ITEM_RECS_CACHE_TTL)
+            self.item_vector_memo = AsyncMemo(maxsize=ITEM_RECS_CACHE_SIZE, ttl=ITEM_VECTOR_MEMO_TTL)
+            self.popularity_pool = PopularityPool(
+                fetch_popularity,
+                refresh_interval=POPULARITY_REFRESH_INTERVAL,
+                refresh_concurrency=POPULARITY_REFRESH_CONCURRENCY,
+            )
+            self.event_ingestor = EventIngestor(
+                process_event_batch,
+                max_queue_size=EVENT_QUEUE_SIZE,
+                batch_size=EVENT_BATCH_SIZE,
+                flush_interval=EVENT_FLUSH_INTERVAL,
+                put_timeout=EVENT_PUT_TIMEOUT,
+            )
             self._load_redis_kv()
-            self._load_data()
+            self._load_known_users()
+            self._set_data(self._build_data())
             self.empty_image = self._generate_empty_image()
-            self.query_config = self._load_query_config()
-
-    def recalc(self):
-        """Recalculate application data."""
-        with self.lock:
-            self._load_data()
+            self.query_config = load_query_config()
+            self.query_templates = compile_query_config(self.query_config)
+
+    async def recalc(self):
+        """
+        Recalculate application data.
+        The data is built in a worker thread, off the event loop, and swapped in under the lock.
+        Recalculations run one at a time, so an older build never replaces a newer one.
+        """
+        async with self.recalc_lock:
+            data = await asyncio.to_thread(self._build_data)
+            with self.lock:
+                self._set_data(data)
+                self.item_recs_cache.clear()
+                self.item_vector_memo.clear()
+
+    async def close(self):
+        """Release resources held by the application state."""
+        if self.event_ingestor is not None:
+            # flush queued events before the SL client is closed
+            await self.event_ingestor.stop()
+        if self.popularity_pool is not None:
+            await self.popularity_pool.stop()
+        if self.sl_client is not None:
+            await self.sl_client.aclose()
+        if self.redis_kv is not None:
+            await self.redis_kv.close()
 
     def _setup_logging(self):
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger()
 
+    def _load_sl_client(self):
+        limits = httpx.Limits(max_connections=SL_POOL_SIZE, max_keepalive_connections=SL_KEEPALIVE_POOL_SIZE)
+        self.sl_client = httpx.AsyncClient(headers=SL_HEADERS, limits=limits, timeout=SL_DEFAULT_TIMEOUT)
+
     def _load_redis_kv(self):
         redis_credentials = {'host': os.getenv('REDIS_HOST'), 'port': os.getenv('REDIS_PORT')}
-        self.redis_kv = RedisKV(credentials=redis_credentials)
-
-    def _load_data(self):
+        self.redis_kv = AsyncRedisKV(
+            credentials=redis_credentials,
+            max_connections=REDIS_POOL_SIZE,
+            max_topics_per_user=USER_TOPICS_MAX,
+            default_ttl=USER_TOPICS_TTL,
+        )
+
+    def _load_known_users(self):
+        self.known_users = KnownUsers(self.redis_kv, use_redis_set=KNOWN_USERS_REDIS_SET)
+
+    def _build_data(self):
+        """Load the product data and the structures derived from it, without touching the state."""
         products_df = pd.read_json(os.getenv('PRODUCT_DATASET_PATH'), lines=True)
-        self.products_df = products_df
-        self.product_id_to_topic = products_df.set_index("id")["topic"].to_dict()
-        self.product_id_to_type = products_df.set_index("id")["product_type"].to_dict()
+        return {
+            'products_df': products_df,
+            'product_id_to_topic': products_df.set_index("id")["topic"].to_dict(),
+            'product_id_to_type': products_df.set_index("id")["product_type"].to_dict(),
+            'item2vec_store': self._load_item2vec_store(products_df),
+        }
+
+    def _set_data(self, data):
+        self.products_df = data['products_df']
+        self.product_id_to_topic = data['product_id_to_topic']
+        self.product_id_to_type = data['product_id_to_type']
+        self.item2vec_store = data['item2vec_store']
+
+    def _load_item2vec_store(self, products_df):
+        # prefer the vectors written by item2vec.py, fallback to the ones shipped with the product dataset
+        item2vec_path = os.getenv('ITEM2VEC_DATASET_PATH')
+        try:
+            store = Item2VecStore.from_path(item2vec_path) if item2vec_path else Item2VecStore.from_frame(products_df)
+        except Exception as e:
+            self.logger.error(f"Failed to load item2vec vectors: {e}")
+            store = Item2VecStore()
+        self.logger.info(f"Loaded {len(store)} item2vec vectors")
+        return store
 
     def _generate_empty_image(self):
         empty_image = Image.new('RGB', (255, 255))
@@ -89,11 +211,6 @@ class AppState:
         # return empty_image
 
 
-    def _load_query_config(self):
-        config_path = __dir__ / "config" / "query_config.json"
-        with open(config_path, 'r') as config_file:
-            return json.load(config_file)
-
 
 @asynccontextmanager
 async def startup_event(app: FastAPI):
@@ -102,21 +219,31 @@ async def startup_event(app: FastAPI):
     try:
         app_state = AppState()
         app_state.init()
+        await app_state.known_users.seed()
+        app_state.popularity_pool.start()
+        if EVENT_INGEST_MODE == 'async':
+            app_state.event_ingestor.start()
         yield
     except Exception as e:
         app_state.logger.error(f"Error during startup: {e}")
+    finally:
+        await app_state.close()
 
 
-def call_sl_url(path_name, data=None):
-    """Makes an HTTP POST request to an SL API endpoint."""
+async def call_sl_url(path_name, data=None, content=None):
+    """
+    Makes an HTTP POST request to an SL API endpoint over the shared connection pool.
+    Pass either `data` to be JSON encoded or a pre-serialized JSON `content` body.
+    """
     url = SL_API_MAP.get(path_name)
     if not url:
         raise ValueError(f"Invalid path name: {path_name}")
     
-    headers = {"accept": "application/json", "Content-Type": "application/json"}
-    
     try:
-        response = requests.post(url, headers=headers, json=data or {})
+        if content is not None:
+            response = await app_state.sl_client.post(url, content=content, timeout=SL_TIMEOUT_MAP[path_name])
+        else:
+            response = await app_state.sl_client.post(url, json=data or {}, timeout=SL_TIMEOUT_MAP[path_name])
         response.raise_for_status()
         
         # Check if response has content
@@ -132,7 +259,7 @@ def call_sl_url(path_name, data=None):
             app_state.logger.error(f"Response content: {response.text[:200]}...")  # Log first 200 chars
             return response.status_code, {"error": "Invalid JSON response", "raw_response": response.text}
             
-    except requests.exceptions.RequestException as req_error:
+    except httpx.HTTPError as req_error:
         app_state.logger.error(f"Request error for {path_name}: {req_error}")
         return 500, {"error": str(req_error)}
         
@@ -154,35 +281,36 @@ def get_user_dummy_vector(user_id):
     }
 
 def get_collaborative_vector(sl_results):
-    normalize = lambda x: x / np.linalg.norm(x) if np.linalg.norm(x) > 0 else x
-    return normalize(np.mean([i['metadata']['vector_parts'][0] for i in sl_results['entries']], axis=0)).tolist()
+    return vectors.mean_normalized(vectors.vector_parts_matrix(sl_results))
 
-def get_item2vec(item_id, entity_type='item'):
+async def get_item2vec(item_id, entity_type='item'):
     if entity_type == 'item':
-        _, data = call_sl_url("product_item2vec", {"product_id": item_id})
+        item2vec_vector = app_state.item2vec_store.get(item_id)
+        if item2vec_vector is not None:
+            return item2vec_vector
+        _, data = await call_sl_url("product_item2vec", {"product_id": item_id})
     else:
-        _, data = call_sl_url("user_item2vec", {"user_id": item_id})
-    item2vec_vector = data['entries'][0]['metadata']['vector_parts'][0]
-    return item2vec_vector
+        _, data = await call_sl_url("user_item2vec", {"user_id": item_id})
+    return vectors.to_vector(data['entries'][0]['metadata']['vector_parts'][0])
 
-def check_user_exist(id):
-    _, data = call_sl_url("user_item2vec", {"user_id": id})
+async def check_user_exist(id):
+    _, data = await call_sl_url("user_item2vec", {"user_id": id})
     return len(data['entries']) > 0
 
-def populate_collobarative_by_neighbors(_id, _type, limit=10):
+async def populate_collobarative_by_neighbors(_id, _type, limit=10):
     param = 'cb_neighbors_user' if _type == 'user' else 'cb_neighbors_item'
-    data = app_state.query_config.get(param)['params']
-    data['limit'] = limit
+    template = app_state.query_templates[param]
     if _type == 'user':
-        data['user_id'] = str(_id)
+        body = template.render(limit=limit, user_id=str(_id))
     else:
-        data['product_id'] = str(_id)
-    if _type == 'user':
-        _, results = call_sl_url("user2item", data=data)
-    else:
-        _, results = call_sl_url("item2item", data=data)
+        body = template.render(limit=limit, product_id=str(_id))
+    _, results = await call_sl_url(template.path_name, content=body)
     return get_collaborative_vector(results)
 
+def get_item_recs_cache_key(template: QueryTemplate, item_id, limit):
+    """Item-to-item results only depend on the item, the limit and the query config params."""
+    return (template.name, str(item_id), int(limit), template.fingerprint)
+
 def clean_metadata_from_results(results):
     cleaned = []
     for item in results:
@@ -192,209 +320,251 @@ def clean_metadata_from_results(results):
         cleaned.append(cleaned_item)
     return cleaned
 
-def get_popularity(topic=None, product_type=None, user_id=None, limit=10):
-    """Returns popular item recommendations."""
+async def fetch_popularity(topic, product_type):
+    """Fetches a popularity pool from SL, used by the background refresh of `PopularityPool`."""
+    if topic:
+        _, results = await call_sl_url("filtered_popularity", data={"query_topic": topic, "query_product_type": product_type, "limit": POPULARITY_POOL_SIZE})
+    else:
+        _, results = await call_sl_url("popularity", data={"limit": POPULARITY_POOL_SIZE})
+    return results['entries']
+
+async def get_popularity(topic=None, product_type=None, user_id=None, limit=10):
+    """Returns popular item recommendations sampled from the in-memory popularity pools."""
     limit = int(limit)
     if user_id:
-        user_topics = app_state.redis_kv.get_user_topics(user_id, top=3)
+        user_topics = await app_state.redis_kv.get_user_topics(user_id, top=3)
         if user_topics:
-            recs = []
-            for topic in user_topics:
-                _, results = call_sl_url("filtered_popularity", data={"query_topic": topic, "query_product_type": "", "limit": 100})
-                results_list = results['entries']
-                random.shuffle(results_list)
-                recs.append(results_list[:limit])
-            ## shuffle the results randomly and return the top limit
+            recs = await asyncio.gather(*[app_state.popularity_pool.sample(topic, "", limit) for topic in user_topics])
+            ## interleave the sampled topics and return the top limit
             return [item for sublist in zip(*recs) for item in sublist][:limit]
-    if topic:
-        _, results = call_sl_url("filtered_popularity", data={"query_topic": topic, "query_product_type": product_type or "", "limit": 100})
-    else:
-        _, results = call_sl_url("popularity", data={"limit": max(limit ,100)})
-    results_list = results['entries']
-    ##shuffle the results randomly and return the top limit
-    random.shuffle(results_list)
-    return results_list[:limit]
+    return await app_state.popularity_pool.sample(topic, product_type, limit)
 
 # FastAPI App
 app = FastAPI(lifespan=startup_event)
 
-@app.post("/api/ingest/event")
-async def ingest_event(event: dict):
-    try:
-        app_state.logger.info(f"Event ingestion: {event}")
+async def process_event_batch(events):
+    """
+    Ingests a batch of events. User existence checks, dummy user creation and event ingestion
+    each run concurrently across the batch, distinct users are only checked once.
+    """
+    prepared = []
+    statuses = [None] * len(events)
+    for idx, event in enumerate(events):
+        ## a malformed event only fails itself, not the batch it shares with other users' events
+        try:
+            user_id = event['user']
+            product_id = int(event['product'])
+            event['created_at']
+        except (KeyError, TypeError, ValueError) as e:
+            statuses[idx] = {"status": "failed", "err": f"Invalid event: {e!r}"}
+            continue
+        if not user_id:
+            statuses[idx] = {"status": "failed", "err": "Invalid event: missing user"}
+            continue
         if 'id' not in event:
             event['id'] = str(uuid.uuid4().hex)
-        user_id = event['user']
-        product_id = event['product']
-        topic = app_state.product_id_to_topic.get(int(product_id))
-        
+        topic = app_state.product_id_to_topic.get(product_id)
         if topic is None:
-            return {"status": "failed", "err": f"Missing data for product {product_id}"}
-        
-        user_topic_id = f"{user_id}_{topic}"
-        if not check_user_exist(user_topic_id):
-            app_state.logger.info(f"No existing vectors for user {user_topic_id} - creating dummy user..")
-            user_dummy_data = get_user_dummy_vector(user_topic_id)
-            app_state.logger.info(f"User ingestion: {user_dummy_data}")
-            user_ingest_code, _ = call_sl_url("ingest_user", user_dummy_data)
-            if 200 <= user_ingest_code < 300:
-                event["user"] = user_topic_id
-                event_ingest_code, _ = call_sl_url("ingest_event", event)
-                
-                if 200 <= event_ingest_code < 300:
-                    app_state.redis_kv.set_user_event_topic(user_id, topic ,event['created_at'])
-                    return {"status": "success", "err": ""}
+            statuses[idx] = {"status": "failed", "err": f"Missing data for product {product_id}"}
+            continue
+        prepared.append((idx, event, user_id, topic, f"{user_id}_{topic}"))
+
+    user_topic_ids = [
+        user_topic_id for user_topic_id in dict.fromkeys(user_topic_id for *_, user_topic_id in prepared)
+        if user_topic_id not in app_state.known_users
+    ]
+    ## a failed lookup or ingestion only fails the events of its own user topic, not the whole batch
+    exists = await asyncio.gather(*[check_user_exist(user_topic_id) for user_topic_id in user_topic_ids], return_exceptions=True)
+    failed_users = {}
+    for user_topic_id, exist in zip(user_topic_ids, exists):
+        if isinstance(exist, Exception):
+            app_state.logger.error(f"User lookup failed for {user_topic_id}: {exist!r}")
+            failed_users[user_topic_id] = f"User lookup failed for {user_topic_id}: {exist!r}"
+    await app_state.known_users.add(user_topic_id for user_topic_id, exist in zip(user_topic_ids, exists) if exist is True)
+    new_users = [user_topic_id for user_topic_id, exist in zip(user_topic_ids, exists) if exist is False]
+    for user_topic_id in new_users:
+        app_state.logger.info(f"No existing vectors for user {user_topic_id} - creating dummy user..")
+    user_ingest_results = await asyncio.gather(
+        *[call_sl_url("ingest_user", get_user_dummy_vector(user_topic_id)) for user_topic_id in new_users],
+        return_exceptions=True,
+    )
+    for user_topic_id, result in zip(new_users, user_ingest_results):
+        if isinstance(result, Exception) or not 200 <= result[0] < 300:
+            failed_users[user_topic_id] = f"Failed to create user {user_topic_id}"
+    await app_state.known_users.add(user_topic_id for user_topic_id in new_users if user_topic_id not in failed_users)
+
+    ready = []
+    for idx, event, user_id, topic, user_topic_id in prepared:
+        if user_topic_id in failed_users:
+            statuses[idx] = {"status": "failed", "err": failed_users[user_topic_id]}
+            continue
+        event["user"] = user_topic_id
+        ready.append((idx, event, user_id, topic))
+    event_ingest_results = await asyncio.gather(*[call_sl_url("ingest_event", event) for _, event, *_ in ready], return_exceptions=True)
+    user_event_topics = []
+    for (idx, event, user_id, topic), result in zip(ready, event_ingest_results):
+        if isinstance(result, Exception):
+            app_state.logger.error(f"Event ingestion failed for {event['id']}: {result!r}")
+            statuses[idx] = {"status": "failed", "err": f"Event ingestion failed: {result!r}"}
+        elif 200 <= result[0] < 300:
+            user_event_topics.append((user_id, topic, event['created_at']))
+            statuses[idx] = {"status": "success", "err": ""}
         else:
-            event["user"] = user_topic_id
-            event_ingest_code, _ = call_sl_url("ingest_event", event)
-            if 200 <= event_ingest_code < 300:
-                app_state.redis_kv.set_user_event_topic(user_id, topic ,event['created_at'])
-                return {"status": "success", "err": ""}
-    
+            statuses[idx] = {"status": "failed", "err": f"Event ingestion failed with code {result[0]}"}
+    if user_event_topics:
+        await app_state.redis_kv.set_user_event_topics(user_event_topics, ttl=USER_TOPICS_TTL)
+    return statuses
+
+
+@app.post("/api/ingest/event")
+async def ingest_event(event: dict):
+    try:
+        app_state.logger.info(f"Event ingestion: {event}")
+        if EVENT_INGEST_MODE == 'async':
+            if await app_state.event_ingestor.submit(event):
+                return {"status": "queued", "err": ""}
+            return {"status": "failed", "err": "Event queue is full"}
+        statuses = await process_event_batch([event])
+        return statuses[0]
     except Exception as e:
         app_state.logger.error(f"Event ingestion failed g: {e}")
         return {"status": "failed", "err": str(e)}
 
+
+@app.post("/api/ingest/events")
+async def ingest_events(events: list[dict]):
+    """Ingests a batch of events, returns one status per event in the same order."""
+    try:
+        app_state.logger.info(f"Events ingestion: {len(events)} events")
+        if EVENT_INGEST_MODE == 'async':
+            return [
+                {"status": "queued", "err": ""} if await app_state.event_ingestor.submit(event)
+                else {"status": "failed", "err": "Event queue is full"}
+                for event in events
+            ]
+        return await process_event_batch(events)
+    except Exception as e:
+        app_state.logger.error(f"Events ingestion failed: {e}")
+        return [{"status": "failed", "err": str(e)} for _ in events]
+
     
 @app.post("/api/ingest/product")
 async def ingest_product(product_data):
     """Handles product ingestion."""
     await call_sl_url('ingest_product', data=product_data)
-    app_state.recalc()
+    await app_state.recalc()
 
 
 @app.post("/api/ingest/data_load")
 async def load_data_from_source():
     """Handles event ingestion."""
-    call_sl_url('data_loader_run')
-    app_state.recalc()
+    await call_sl_url('data_loader_run')
+    await app_state.recalc()
+
+
+async def get_user_topic_recommendations(uid, limit):
+    """Runs the item2vec lookup -> collaborative fallback -> user2item chain for a single user topic."""
+    product_item2vec = await get_item2vec(uid, 'user')
+    if vectors.is_empty(product_item2vec):
+        collobarative_vector = await populate_collobarative_by_neighbors(uid, 'user', 5)
+    else:
+        collobarative_vector = product_item2vec
+    template = app_state.query_templates['user']
+    body = template.render(limit=limit, user_id=uid, collaborative_vector=vectors.to_payload(collobarative_vector))
+    _, results = await call_sl_url(template.path_name, content=body)
+    return results['entries']
 
 
 @app.get("/api/search/user_recommendations")
-async def get_user_recommendations(user_id, limit=10):
+async def get_user_recommendations(user_id, limit=10, deadline: float = None):
 
-    """Returns user recommendations."""
+    """Returns user recommendations.
+
+    Per-topic pipelines run concurrently. When `deadline` (seconds) is set, only the
+    topics that completed in time are interleaved.
+    """
+    deadline = deadline or USER_RECS_DEADLINE
     try:
-        user_topics = app_state.redis_kv.get_user_topics(user_id, top=3)
+        user_topics = await app_state.redis_kv.get_user_topics(user_id, top=3)
         if not user_topics:
             raise Exception("User vectors doesn't exists")
         user_topic_ids = [f"{user_id}_{topic}" for topic in user_topics]
-        query_data = app_state.query_config.get('user')['params']
-        query_data['limit'] = int(limit)
+        tasks = [asyncio.create_task(get_user_topic_recommendations(uid, int(limit))) for uid in user_topic_ids]
+        _, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            app_state.logger.info(f"{len(pending)} of {len(tasks)} topics for user {user_id} missed the {deadline}s deadline")
         recs = []
-        for uid in user_topic_ids:
-            product_item2vec = get_item2vec(uid, 'user')
-            if sum(product_item2vec) == 0:
-                collobarative_vector = populate_collobarative_by_neighbors(uid, 'user', 5)
-            else:
-                collobarative_vector = product_item2vec
-            uid_data = query_data
-            uid_data['user_id'] = uid
-            uid_data['collaborative_vector'] = collobarative_vector
-            _, results = call_sl_url("user2item", data=uid_data)
-            recs.append(results['entries'])
+        for uid, task in zip(user_topic_ids, tasks):
+            if task.cancelled() or not task.done():
+                continue
+            if task.exception() is not None:
+                app_state.logger.error(f"Error getting recommendations for {uid}: {task.exception()}")
+                continue
+            recs.append(task.result())
+        if not recs:
+            raise Exception("No topic recommendations completed")
         results = [item for sublist in zip(*recs) for item in sublist][:int(limit)]
         return clean_metadata_from_results(results)
     except Exception as e:
         app_state.logger.error(f"Error getting user recommendations: {e}, fallback to popularity")
-        results = get_popularity(user_id=user_id, limit=limit)
+        results = await get_popularity(user_id=user_id, limit=limit)
         return clean_metadata_from_results(results)
 
 
-@app.get("/api/search/item_similarity")
-async def get_item_similarity(item_id, limit=10):
-    """Returns similar item recommendations."""
-    logger = app_state.logger
+async def get_item_collaborative_vector(item_id):
+    """Returns the item2vec vector of an item, falling back to the mean of its content-based neighbors."""
+    product_item2vec = await get_item2vec(item_id)
+    if vectors.is_empty(product_item2vec):
+        return await populate_collobarative_by_neighbors(item_id, 'item', 5)
+    return product_item2vec
+
+
+async def get_item_recommendations(config_key, item_id, limit=10):
+    """
+    Generic item recommendation pipeline driven by a query_config.json entry:
+    vector lookup -> collaborative fallback -> item2item -> popularity fallback.
+    """
+    template = app_state.query_templates[config_key]
+    cache_key = get_item_recs_cache_key(template, item_id, limit)
+    cached = app_state.item_recs_cache.get(cache_key)
+    if cached is not None:
+        return cached
     item_topic = app_state.product_id_to_topic.get(int(item_id))
     item_type = app_state.product_id_to_type.get(int(item_id))
-    query_data = app_state.query_config.get('item_similarity')['params']
-    query_data['limit'] = int(limit)
-    query_data['product_id'] = str(item_id)
     try:
-        product_item2vec = get_item2vec(item_id)
-        if sum(product_item2vec) == 0:
-            collobarative_vector = populate_collobarative_by_neighbors(item_id, 'item', 5)
-        else:
-            collobarative_vector = product_item2vec
-        query_data['collaborative_vector'] = collobarative_vector
-        _, results = call_sl_url("item2item", data = query_data)
-        return clean_metadata_from_results(results['entries'])
+        collobarative_vector = await app_state.item_vector_memo.get_or_compute(
+            str(item_id), lambda: get_item_collaborative_vector(item_id)
+        )
+        body = template.render(limit=int(limit), product_id=str(item_id), collaborative_vector=vectors.to_payload(collobarative_vector))
+        _, results = await call_sl_url(template.path_name, content=body)
+        results = clean_metadata_from_results(results['entries'])
+        app_state.item_recs_cache.set(cache_key, results)
+        return results
     except Exception as e:
-        app_state.logger.error(f"Error getting item similarity: {e}, fallback to popularity")
-        results = get_popularity(topic=item_topic, product_type=item_type, limit=limit)
+        app_state.logger.error(f"Error getting {config_key} recommendations: {e}, fallback to popularity")
+        results = await get_popularity(topic=item_topic, product_type=item_type, limit=limit)
         return clean_metadata_from_results(results)
 
 
-@app.get("/api/search/item_users_similarity")
-async def get_item_similarity(item_id, limit=10):
-    """Returns similar item recommendations."""
-    logger = app_state.logger
-    item_topic = app_state.product_id_to_topic.get(int(item_id))
-    item_type = app_state.product_id_to_type.get(int(item_id))
-    query_data = app_state.query_config.get('item_users_similarity')['params']
-    query_data['limit'] = int(limit)
-    query_data['product_id'] = str(item_id)
-    try:
-        product_item2vec = get_item2vec(item_id)
-        if sum(product_item2vec) == 0:
-            collobarative_vector = populate_collobarative_by_neighbors(item_id, 'item', 5)
-        else:
-            collobarative_vector = product_item2vec
-        query_data['collaborative_vector'] = collobarative_vector
-        _, results = call_sl_url("item2item", data = query_data)
-        return clean_metadata_from_results(results['entries'])
-    except Exception as e:
-        app_state.logger.error(f"Error getting item similarity: {e}, fallback to popularity")
-        results =  get_popularity(topic=item_topic, product_type=item_type, limit=limit)
-        return clean_metadata_from_results(results)
+def make_item_recommendations_route(config_key):
+    async def route(item_id, limit=10):
+        return await get_item_recommendations(config_key, item_id, limit)
+    route.__name__ = f"get_{config_key}"
+    route.__doc__ = f"Returns {config_key.replace('_', ' ')} item recommendations."
+    return route
 
 
-@app.get("/api/search/item_complement_type")
-async def get_item_type_complementary(item_id, limit=10):
-    """Returns complementary type item recommendations."""
-    logger = app_state.logger
-    item_topic = app_state.product_id_to_topic.get(int(item_id))
-    item_type = app_state.product_id_to_type.get(int(item_id))
-    query_data = app_state.query_config.get('item_complementary_type')['params']
-    query_data['limit'] = int(limit)
-    query_data['product_id'] = str(item_id)
-    try:
-        product_item2vec = get_item2vec(item_id)
-        if sum(product_item2vec) == 0:
-            collobarative_vector = populate_collobarative_by_neighbors(item_id, 'item', 5)
-        else:
-            collobarative_vector = product_item2vec
-        query_data['collaborative_vector'] = collobarative_vector
-        _, results = call_sl_url("item2item", data = query_data)
-        return clean_metadata_from_results(results['entries'])
-    except Exception as e:
-        app_state.logger.error(f"Error getting item type complementary - {e}, fallback to popularity")
-        results = get_popularity(topic=item_topic, product_type=item_type, limit=limit)
-        return clean_metadata_from_results(results)
+def register_item_recommendations_routes(app, item_routes):
+    """Registers a /api/search/<route> endpoint for every query_config.json entry with a `route`."""
+    for route, config_key in item_routes.items():
+        app.add_api_route(f"/api/search/{route}", make_item_recommendations_route(config_key), methods=["GET"])
 
 
-@app.get("/api/search/item_complement_topic")
-async def get_item_type_complementary(item_id, limit=10):
-    """Returns complementary topic item recommendations."""
-    logger = app_state.logger
-    item_topic = app_state.product_id_to_topic.get(int(item_id))
-    item_type = app_state.product_id_to_type.get(int(item_id))
-    query_data = app_state.query_config.get('item_complementary_topic')['params']
-    query_data['limit'] = int(limit)
-    query_data['product_id'] = str(item_id)
-    try:
-        product_item2vec = get_item2vec(item_id)
-        if sum(product_item2vec) == 0:
-            collobarative_vector = populate_collobarative_by_neighbors(item_id, 'item', 5)
-        else:
-            collobarative_vector = product_item2vec
-        query_data['collaborative_vector'] = collobarative_vector
-        _, results = call_sl_url("item2item", data = query_data)
-        return clean_metadata_from_results(results['entries'])
-    except Exception as e:
-        app_state.logger.error(f"Error getting item topic complementary - {e}, fallback to popularity")
-        results =  get_popularity(topic=item_topic, product_type=item_type, limit=limit)
-        return clean_metadata_from_results(results)
+# route name -> query_config.json entry
+ITEM_RECOMMENDATION_ROUTES = {entry['route']: config_key for config_key, entry in load_query_config().items() if 'route' in entry}
+register_item_recommendations_routes(app, ITEM_RECOMMENDATION_ROUTES)
 
 @app.get("/api/search/nlq2item")
 async def get_item_by_nli(query, limit=10):
@@ -403,11 +573,11 @@ async def get_item_by_nli(query, limit=10):
     query_data['natural_query'] = query
     query_data['limit'] = int(limit)
     try:
-        _, results = call_sl_url("nlq2item", data=query_data)
+        _, results = await call_sl_url("nlq2item", data=query_data)
         return clean_metadata_from_results(results['entries'])
     except Exception as e:
         app_state.logger.error(f"Error getting item by NLI: {e}")
-        results = get_popularity(limit=limit)
+        results = await get_popularity(limit=limit)
         return clean_metadata_from_results(results)
 
 @app.get("/api/search/item_popularity")
@@ -415,12 +585,39 @@ async def get_item_popularity(item_id, limit=10):
     """Returns popular item recommendations."""
     item_topic = app_state.product_id_to_topic.get(int(item_id))
     item_type = app_state.product_id_to_type.get(int(item_id))
-    results =  get_popularity(topic=item_topic, product_type=item_type, limit=limit)
+    results =  await get_popularity(topic=item_topic, product_type=item_type, limit=limit)
     return clean_metadata_from_results(results)
 
+@app.get("/api/search/item_recommendations")
+async def get_item_multi_recommendations(item_id, strategies: str = None, limit=10):
+    """
+    Returns the recommendations of several strategies for an item in one response, computed concurrently.
+    `strategies` is a comma separated list of item endpoint names (e.g. `item_similarity,item_popularity`),
+    all item strategies are returned when omitted.
+    """
+    available = [*ITEM_RECOMMENDATION_ROUTES, 'item_popularity']
+    names = [name.strip() for name in strategies.split(',') if name.strip()] if strategies else available
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown strategies {unknown}, available: {available}")
+    results = await asyncio.gather(*[
+        get_item_popularity(item_id, limit) if name == 'item_popularity'
+        else get_item_recommendations(ITEM_RECOMMENDATION_ROUTES[name], item_id, limit)
+        for name in names
+    ])
+    return dict(zip(names, results))
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    return {"item_recs": app_state.item_recs_cache.stats(), "popularity": app_state.popularity_pool.stats()}
+
+@app.get("/api/ingest/event/stats")
+async def get_event_ingestion_stats():
+    return {"mode": EVENT_INGEST_MODE, **app_state.event_ingestor.stats()}
+
 @app.get("/api/get_user_topics")
 async def get_user_topics(user_id):
-    return app_state.redis_kv.get_user_topics(user_id, top=0)
+    return await app_state.redis_kv.get_user_topics(user_id, top=0)
 
 
 if __name__ == "__main__":
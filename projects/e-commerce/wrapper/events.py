@@ -0,0 +1,88 @@
+import asyncio
+import logging
+
+
+class EventIngestor:
+    """
+    Bounded in-memory event queue drained by a background worker in micro-batches.
+    `process_batch` is an async callable receiving a list of events and returning one status per event.
+    """
+
+    def __init__(self, process_batch, max_queue_size=10000, batch_size=50, flush_interval=0.5, put_timeout=0.1):
+        self.process_batch = process_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.logger = logging.getLogger(__name__)
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        self.counters = {"accepted": 0, "rejected": 0, "processed": 0, "failed_events": 0, "failed_batches": 0}
+        self._task = None
+        self._closing = False
+
+    async def submit(self, event):
+        """
+        Queue an event for ingestion.
+        When the queue is full waits up to `put_timeout` seconds for room, then rejects the event.
+        """
+        if self._closing:
+            self.counters["rejected"] += 1
+            return False
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self.queue.put(event), timeout=self.put_timeout)
+            except asyncio.TimeoutError:
+                self.counters["rejected"] += 1
+                return False
+        self.counters["accepted"] += 1
+        return True
+
+    async def _next_batch(self):
+        """Collect up to `batch_size` events, waiting at most `flush_interval` seconds."""
+        batch = []
+        loop = asyncio.get_running_loop()
+        flush_at = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = flush_at - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch):
+        try:
+            statuses = await self.process_batch(batch)
+            self.counters["failed_events"] += sum(status["status"] != "success" for status in statuses or [])
+        except Exception as e:
+            self.counters["failed_batches"] += 1
+            self.logger.error(f"Failed to ingest batch of {len(batch)} events: {e}")
+        finally:
+            self.counters["processed"] += len(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    async def _run(self):
+        while not (self._closing and self.queue.empty()):
+            batch = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+
+    def start(self):
+        """Start the background worker."""
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop accepting events and wait until the worker has flushed the queue."""
+        self._closing = True
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    def stats(self):
+        return {**self.counters, "queued": self.queue.qsize(), "max_queue_size": self.queue.maxsize}
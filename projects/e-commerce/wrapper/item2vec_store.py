@@ -0,0 +1,53 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+
+class Item2VecStore:
+    """
+    In-memory item2vec vectors of all products, kept as one contiguous float32 matrix
+    with a product id -> row lookup.
+    """
+
+    def __init__(self, ids=(), vectors=None, dim=100):
+        self.logger = logging.getLogger(__name__)
+        self.id_to_row = {str(_id): row for row, _id in enumerate(ids)}
+        if vectors is None:
+            vectors = np.zeros((0, dim), dtype=np.float32)
+        self.matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    @classmethod
+    def from_frame(cls, products_df, id_col='id', vector_col='item_w2v'):
+        """
+        Build the store from a products DataFrame holding one vector per row.
+        Rows without a vector are skipped.
+        """
+        if products_df is None or vector_col not in products_df.columns:
+            return cls()
+        products_df = products_df[products_df[vector_col].apply(lambda v: isinstance(v, (list, np.ndarray)) and len(v) > 0)]
+        if products_df.empty:
+            return cls()
+        return cls(ids=products_df[id_col].tolist(), vectors=np.vstack(products_df[vector_col].to_numpy()))
+
+    @classmethod
+    def from_path(cls, path, id_col='id', vector_col='item_w2v'):
+        """
+        Build the store from the `products_df.json` written by `item2vec.py`.
+        """
+        return cls.from_frame(pd.read_json(path, orient='records'), id_col=id_col, vector_col=vector_col)
+
+    def __len__(self):
+        return len(self.id_to_row)
+
+    def __contains__(self, product_id):
+        return str(product_id) in self.id_to_row
+
+    def get(self, product_id):
+        """
+        Return the item2vec vector of a product, or None if the product is unknown.
+        """
+        row = self.id_to_row.get(str(product_id))
+        if row is None:
+            return None
+        return self.matrix[row]
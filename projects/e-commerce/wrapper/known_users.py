@@ -0,0 +1,37 @@
+import logging
+
+
+class KnownUsers:
+    """
+    Local set of `{user_id}_{topic}` ids that already exist in Superlinked,
+    so only new users cost a `user_item2vec` lookup.
+    Optionally written through to a Redis set shared between wrapper instances.
+    """
+
+    def __init__(self, redis_kv, use_redis_set=False):
+        self.redis_kv = redis_kv
+        self.use_redis_set = use_redis_set
+        self.logger = logging.getLogger(__name__)
+        self._user_topic_ids = set()
+
+    async def seed(self):
+        """Load the user topic ids already known to Redis."""
+        user_topic_ids = await self.redis_kv.get_user_topic_ids()
+        if self.use_redis_set:
+            user_topic_ids |= await self.redis_kv.get_known_users()
+        self._user_topic_ids |= user_topic_ids
+        self.logger.info(f"Seeded {len(self._user_topic_ids)} known users")
+
+    def __contains__(self, user_topic_id):
+        return user_topic_id in self._user_topic_ids
+
+    def __len__(self):
+        return len(self._user_topic_ids)
+
+    async def add(self, user_topic_ids):
+        new_ids = set(user_topic_ids) - self._user_topic_ids
+        if not new_ids:
+            return
+        self._user_topic_ids |= new_ids
+        if self.use_redis_set:
+            await self.redis_kv.add_known_users(new_ids)
@@ -2,21 +2,40 @@ from redis import Redis
 import logging
 
 
+USER_TOPICS_KEY_PREFIX = 'user_topics_set:'
+KNOWN_USER_TOPICS_KEY = 'known_user_topics'
+
+
+def queue_user_event_topic(pipe, user_id, topic, created_at, ttl=None, max_topics=None):
+    """
+    Queue the commands storing a user event topic on a pipeline:
+    add the topic, trim the set to the `max_topics` most recent ones and refresh the TTL.
+    """
+    key = f'{USER_TOPICS_KEY_PREFIX}{user_id}'
+    pipe.zadd(key, {topic: created_at})
+    if max_topics:
+        pipe.zremrangebyrank(key, 0, -(max_topics + 1))
+    if ttl:
+        pipe.expire(key, ttl)
+
+
 class RedisKV:
-    def __init__(self, credentials):
+    def __init__(self, credentials, max_topics_per_user=None, default_ttl=None):
         self.redis = Redis(**credentials)
+        self.max_topics_per_user = max_topics_per_user
+        self.default_ttl = default_ttl
         self.logger = logging.getLogger(__name__)
 
     def set_user_event_topic(self, user_id, topic, created_at, ttl=None):
         """
         Add a topic to the user's sorted set with a score (created_at).
-        Optionally set a TTL for the key.
+        The set is trimmed to the most recent `max_topics_per_user` topics in the same transaction.
+        Optionally set a TTL for the key, defaults to `default_ttl`.
         """
         try:
-            key = f'user_topics_set:{user_id}'
-            self.redis.zadd(key, {topic: created_at})
-            if ttl:
-                self.redis.expire(key, ttl)
+            pipe = self.redis.pipeline()
+            queue_user_event_topic(pipe, user_id, topic, created_at, ttl or self.default_ttl, self.max_topics_per_user)
+            pipe.execute()
         except Exception as e:
             self.logger.error(f"Failed to set user event topic: {e}")
             raise
@@ -26,10 +45,79 @@ class RedisKV:
         Retrieve the top N topics for a user from Redis.
         """
         try:
-            key = f'user_topics_set:{user_id}'  # Fixed key formatting
+            key = f'{USER_TOPICS_KEY_PREFIX}{user_id}'
             return [
                 topic.decode() for topic in self.redis.zrevrange(key, 0, top - 1)
             ]
         except Exception as e:
             self.logger.error(f"Failed to get user topics: {e}")
             return []
+
+    def get_users_topics(self, user_ids, top=3):
+        """
+        Retrieve the top N topics for many users in a single round-trip.
+        Returns a dict user_id -> topics.
+        """
+        user_ids = list(user_ids)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.zrevrange(f'{USER_TOPICS_KEY_PREFIX}{user_id}', 0, top - 1)
+            return {
+                user_id: [topic.decode() for topic in topics]
+                for user_id, topics in zip(user_ids, pipe.execute())
+            }
+        except Exception as e:
+            self.logger.error(f"Failed to get users topics: {e}")
+            return {user_id: [] for user_id in user_ids}
+
+    def set_user_event_topics(self, events, ttl=None):
+        """
+        Add many (user_id, topic, created_at) events to the users' sorted sets in a single transaction.
+        """
+        try:
+            pipe = self.redis.pipeline()
+            for user_id, topic, created_at in events:
+                queue_user_event_topic(pipe, user_id, topic, created_at, ttl or self.default_ttl, self.max_topics_per_user)
+            pipe.execute()
+        except Exception as e:
+            self.logger.error(f"Failed to set user event topics: {e}")
+            raise
+
+    def get_user_topic_ids(self):
+        """
+        Retrieve all `{user_id}_{topic}` ids that have events stored in Redis.
+        """
+        try:
+            user_ids = [
+                key.decode()[len(USER_TOPICS_KEY_PREFIX):]
+                for key in self.redis.scan_iter(match=f'{USER_TOPICS_KEY_PREFIX}*', count=1000)
+            ]
+            return {
+                f"{user_id}_{topic}"
+                for user_id, topics in self.get_users_topics(user_ids, top=0).items()
+                for topic in topics
+            }
+        except Exception as e:
+            self.logger.error(f"Failed to get user topic ids: {e}")
+            return set()
+
+    def add_known_users(self, user_topic_ids):
+        """
+        Add user topic ids to the set of users created in Superlinked.
+        """
+        try:
+            if user_topic_ids:
+                self.redis.sadd(KNOWN_USER_TOPICS_KEY, *user_topic_ids)
+        except Exception as e:
+            self.logger.error(f"Failed to add known users: {e}")
+
+    def get_known_users(self):
+        """
+        Retrieve the set of user topic ids created in Superlinked.
+        """
+        try:
+            return {user_topic_id.decode() for user_topic_id in self.redis.smembers(KNOWN_USER_TOPICS_KEY)}
+        except Exception as e:
+            self.logger.error(f"Failed to get known users: {e}")
+            return set()
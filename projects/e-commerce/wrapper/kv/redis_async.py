@@ -0,0 +1,105 @@
+from redis.asyncio import ConnectionPool, Redis
+import logging
+
+from kv.redis import USER_TOPICS_KEY_PREFIX, KNOWN_USER_TOPICS_KEY, queue_user_event_topic
+
+
+class AsyncRedisKV:
+    """
+    asyncio counterpart of `RedisKV` backed by a shared connection pool.
+    """
+
+    def __init__(self, credentials, max_connections=50, max_topics_per_user=None, default_ttl=None):
+        self.pool = ConnectionPool(max_connections=max_connections, **credentials)
+        self.redis = Redis(connection_pool=self.pool)
+        self.max_topics_per_user = max_topics_per_user
+        self.default_ttl = default_ttl
+        self.logger = logging.getLogger(__name__)
+
+    async def close(self):
+        await self.redis.aclose()
+        await self.pool.disconnect()
+
+    async def set_user_event_topic(self, user_id, topic, created_at, ttl=None):
+        """
+        Add a topic to the user's sorted set with a score (created_at).
+        The set is trimmed to the most recent `max_topics_per_user` topics in the same transaction.
+        Optionally set a TTL for the key, defaults to `default_ttl`.
+        """
+        await self.set_user_event_topics([(user_id, topic, created_at)], ttl=ttl)
+
+    async def set_user_event_topics(self, events, ttl=None):
+        """
+        Add many (user_id, topic, created_at) events to the users' sorted sets in a single transaction.
+        """
+        try:
+            async with self.redis.pipeline() as pipe:
+                for user_id, topic, created_at in events:
+                    queue_user_event_topic(pipe, user_id, topic, created_at, ttl or self.default_ttl, self.max_topics_per_user)
+                await pipe.execute()
+        except Exception as e:
+            self.logger.error(f"Failed to set user event topics: {e}")
+            raise
+
+    async def get_user_topics(self, user_id, top=3):
+        """
+        Retrieve the top N topics for a user from Redis.
+        """
+        return (await self.get_users_topics([user_id], top=top))[user_id]
+
+    async def get_users_topics(self, user_ids, top=3):
+        """
+        Retrieve the top N topics for many users in a single round-trip.
+        Returns a dict user_id -> topics.
+        """
+        user_ids = list(user_ids)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.zrevrange(f'{USER_TOPICS_KEY_PREFIX}{user_id}', 0, top - 1)
+                results = await pipe.execute()
+            return {
+                user_id: [topic.decode() for topic in topics]
+                for user_id, topics in zip(user_ids, results)
+            }
+        except Exception as e:
+            self.logger.error(f"Failed to get users topics: {e}")
+            return {user_id: [] for user_id in user_ids}
+
+    async def get_user_topic_ids(self):
+        """
+        Retrieve all `{user_id}_{topic}` ids that have events stored in Redis.
+        """
+        try:
+            user_ids = [
+                key.decode()[len(USER_TOPICS_KEY_PREFIX):]
+                async for key in self.redis.scan_iter(match=f'{USER_TOPICS_KEY_PREFIX}*', count=1000)
+            ]
+            return {
+                f"{user_id}_{topic}"
+                for user_id, topics in (await self.get_users_topics(user_ids, top=0)).items()
+                for topic in topics
+            }
+        except Exception as e:
+            self.logger.error(f"Failed to get user topic ids: {e}")
+            return set()
+
+    async def add_known_users(self, user_topic_ids):
+        """
+        Add user topic ids to the set of users created in Superlinked.
+        """
+        try:
+            if user_topic_ids:
+                await self.redis.sadd(KNOWN_USER_TOPICS_KEY, *user_topic_ids)
+        except Exception as e:
+            self.logger.error(f"Failed to add known users: {e}")
+
+    async def get_known_users(self):
+        """
+        Retrieve the set of user topic ids created in Superlinked.
+        """
+        try:
+            return {user_topic_id.decode() for user_topic_id in await self.redis.smembers(KNOWN_USER_TOPICS_KEY)}
+        except Exception as e:
+            self.logger.error(f"Failed to get known users: {e}")
+            return set()
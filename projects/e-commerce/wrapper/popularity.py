@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import random
+import time
+
+GLOBAL_POOL_KEY = ("", "")
+
+
+class PopularityPool:
+    """
+    In-memory pools of popular items per (topic, product_type) plus a global one.
+    Pools are fetched on first use and then refreshed in the background every `refresh_interval` seconds,
+    requests only sample from memory.
+    Pools not used since the previous refresh are dropped instead of refreshed (the global one is kept),
+    at most `refresh_concurrency` pools are fetched at a time so the refresh leaves connections to live traffic.
+    """
+
+    def __init__(self, fetch, refresh_interval=300, refresh_concurrency=4):
+        # fetch: async callable (topic, product_type) -> list of Superlinked result entries
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.refresh_concurrency = refresh_concurrency
+        self.logger = logging.getLogger(__name__)
+        self._pools = {}
+        self._used = set()
+        self._inflight = {}
+        self._task = None
+
+    @staticmethod
+    def _key(topic=None, product_type=None):
+        if not topic:
+            return GLOBAL_POOL_KEY
+        return (topic, product_type or "")
+
+    async def get(self, topic=None, product_type=None):
+        """
+        Return the pool of popular items for a topic/product type, fetching it if it's not loaded yet.
+        Concurrent first requests for the same pool share a single fetch.
+        """
+        key = self._key(topic, product_type)
+        self._used.add(key)
+        pool = self._pools.get(key)
+        if pool is not None:
+            return pool[0]
+        if key not in self._inflight:
+            self._inflight[key] = asyncio.ensure_future(self._load(key))
+        try:
+            return await asyncio.shield(self._inflight[key])
+        finally:
+            self._inflight.pop(key, None)
+
+    async def sample(self, topic=None, product_type=None, limit=10):
+        """Return `limit` random items from the matching pool."""
+        entries = await self.get(topic, product_type)
+        return random.sample(entries, min(int(limit), len(entries)))
+
+    async def _load(self, key):
+        entries = await self.fetch(*key)
+        self._pools[key] = (entries, time.monotonic())
+        return entries
+
+    async def refresh(self):
+        """
+        Re-fetch the pools used since the previous refresh and drop the others.
+        Pools that fail to refresh keep their previous entries.
+        """
+        used, self._used = self._used, set()
+        for key in [key for key in self._pools if key not in used and key != GLOBAL_POOL_KEY]:
+            del self._pools[key]
+        keys = list(self._pools) or [GLOBAL_POOL_KEY]
+        semaphore = asyncio.Semaphore(self.refresh_concurrency)
+
+        async def load(key):
+            async with semaphore:
+                return await self._load(key)
+
+        results = await asyncio.gather(*[load(key) for key in keys], return_exceptions=True)
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Failed to refresh popularity pool {key}: {result}")
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        """Start the background refresh loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "pools": len(self._pools),
+            "refresh_interval": self.refresh_interval,
+            "refresh_concurrency": self.refresh_concurrency,
+            "oldest_pool_age": max((now - fetched_at for _, fetched_at in self._pools.values()), default=0.0),
+        }
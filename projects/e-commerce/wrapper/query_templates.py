@@ -0,0 +1,46 @@
+import json
+from types import MappingProxyType
+
+# query names used in query_config.json -> SL_API_MAP path names
+QUERY_PATH_NAMES = {
+    'item2item_query': 'item2item',
+    'user2item_query': 'user2item',
+}
+
+
+class QueryTemplate:
+    """
+    Immutable, pre-serialized request body of a query_config.json entry.
+    Requests only serialize their own small fields, which are appended to the cached params JSON.
+    """
+
+    __slots__ = ('name', 'path_name', 'params', 'fingerprint', '_prefix')
+
+    def __init__(self, name, path_name, params):
+        self.name = name
+        self.path_name = path_name
+        self.params = MappingProxyType(dict(params))
+        self.fingerprint = json.dumps(dict(params), sort_keys=True)
+        # the params object without its closing brace, so request fields can be appended
+        self._prefix = json.dumps(dict(params))[:-1]
+
+    def render(self, **fields):
+        """
+        Build the JSON request body of the query with the per-request `fields` merged in.
+        Fields take precedence over template params with the same name.
+        """
+        if not fields:
+            return (self._prefix + '}').encode()
+        separator = ', ' if self.params else ''
+        return (self._prefix + separator + json.dumps(fields)[1:]).encode()
+
+    def __repr__(self):
+        return f"QueryTemplate(name={self.name!r}, path_name={self.path_name!r})"
+
+
+def compile_query_config(query_config):
+    """Compile the entries of query_config.json into query templates keyed by entry name."""
+    return MappingProxyType({
+        name: QueryTemplate(name, QUERY_PATH_NAMES.get(entry['query']), entry['params'])
+        for name, entry in query_config.items()
+    })
@@ -0,0 +1,5 @@
+import os
+import sys
+
+## wrapper modules import each other as top-level modules (`from kv.redis import ...`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,114 @@
+import asyncio
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from kv.redis import KNOWN_USER_TOPICS_KEY, USER_TOPICS_KEY_PREFIX, RedisKV
+from kv.redis_async import AsyncRedisKV
+
+CREDENTIALS = {"host": "localhost", "port": 6379}
+
+
+def make_sync_kv(**kwargs):
+    kv = RedisKV(CREDENTIALS, **kwargs)
+    kv.redis = fakeredis.FakeRedis()
+    return kv
+
+
+class AsyncKVRunner:
+    """Runs the coroutines of an `AsyncRedisKV` to completion, so both classes share the same tests."""
+
+    def __init__(self, **kwargs):
+        self.loop = asyncio.new_event_loop()
+        self.kv = AsyncRedisKV(CREDENTIALS, **kwargs)
+        server = fakeredis.FakeServer()
+        self.kv.redis = fakeredis.aioredis.FakeRedis(server=server)
+        ## sync client on the same server, to inspect keys from the tests
+        self.redis = fakeredis.FakeRedis(server=server)
+
+    def __getattr__(self, name):
+        method = getattr(self.kv, name)
+        return lambda *args, **kwargs: self.loop.run_until_complete(method(*args, **kwargs))
+
+    def close(self):
+        self.loop.run_until_complete(self.kv.close())
+        self.loop.close()
+
+
+@pytest.fixture(params=["sync", "async"])
+def make_kv(request):
+    runners = []
+
+    def make(**kwargs):
+        if request.param == "sync":
+            return make_sync_kv(**kwargs)
+        runners.append(AsyncKVRunner(**kwargs))
+        return runners[-1]
+
+    yield make
+    for runner in runners:
+        runner.close()
+
+
+def test_user_topics_are_ordered_by_recency(make_kv):
+    kv = make_kv()
+    kv.set_user_event_topics([("u1", "shoes", 1), ("u1", "hats", 3), ("u1", "bags", 2), ("u2", "socks", 1)])
+    assert kv.get_user_topics("u1", top=2) == ["hats", "bags"]
+    assert kv.get_user_topics("u2") == ["socks"]
+    assert kv.get_user_topics("unknown") == []
+
+
+def test_get_users_topics(make_kv):
+    kv = make_kv()
+    kv.set_user_event_topics([("u1", "shoes", 1), ("u1", "hats", 2), ("u2", "socks", 1)])
+    assert kv.get_users_topics(["u1", "u2", "u3"], top=3) == {"u1": ["hats", "shoes"], "u2": ["socks"], "u3": []}
+    assert kv.get_users_topics([]) == {}
+
+
+def test_set_user_event_topic_updates_the_score(make_kv):
+    kv = make_kv()
+    kv.set_user_event_topic("u1", "shoes", 1)
+    kv.set_user_event_topic("u1", "hats", 2)
+    kv.set_user_event_topic("u1", "shoes", 3)
+    assert kv.get_user_topics("u1") == ["shoes", "hats"]
+
+
+def test_user_topics_are_trimmed_to_the_most_recent(make_kv):
+    kv = make_kv(max_topics_per_user=2)
+    kv.set_user_event_topics([("u1", "shoes", 1), ("u1", "hats", 3), ("u1", "bags", 2), ("u2", "socks", 1)])
+    kv.set_user_event_topic("u1", "coats", 4)
+    assert kv.redis.zcard(f"{USER_TOPICS_KEY_PREFIX}u1") == 2
+    assert kv.get_user_topics("u1", top=5) == ["coats", "hats"]
+    assert kv.get_user_topics("u2") == ["socks"]
+
+
+def test_user_topics_expire(make_kv):
+    kv = make_kv(default_ttl=3600)
+    kv.set_user_event_topics([("u1", "shoes", 1)])
+    kv.set_user_event_topics([("u2", "hats", 1)], ttl=60)
+    assert 0 < kv.redis.ttl(f"{USER_TOPICS_KEY_PREFIX}u1") <= 3600
+    assert 0 < kv.redis.ttl(f"{USER_TOPICS_KEY_PREFIX}u2") <= 60
+
+
+def test_user_topics_without_ttl_do_not_expire(make_kv):
+    kv = make_kv()
+    kv.set_user_event_topic("u1", "shoes", 1)
+    assert kv.redis.ttl(f"{USER_TOPICS_KEY_PREFIX}u1") == -1
+
+
+def test_get_user_topic_ids(make_kv):
+    kv = make_kv()
+    kv.set_user_event_topics([("u1", "shoes", 1), ("u1", "hats", 2), ("u2", "socks", 1)])
+    kv.redis.set("unrelated", "value")
+    assert kv.get_user_topic_ids() == {"u1_shoes", "u1_hats", "u2_socks"}
+
+
+def test_known_users(make_kv):
+    kv = make_kv()
+    assert kv.get_known_users() == set()
+    kv.add_known_users(["u1_shoes", "u2_socks"])
+    kv.add_known_users([])
+    kv.add_known_users(["u1_shoes"])
+    assert kv.get_known_users() == {"u1_shoes", "u2_socks"}
+    assert kv.redis.scard(KNOWN_USER_TOPICS_KEY) == 2
@@ -1,7 +1,9 @@
 import uuid
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 from app.superlinked import SuperlinkedClient
 
@@ -19,6 +21,8 @@ from app.config import settings
 
 logger = setup_logging()
 
+DEFAULT_LIMIT = 5
+
 st.set_page_config(
     page_title="Superlinked hotel search demo",
     initial_sidebar_state="expanded",
@@ -82,12 +86,42 @@ def load_resources():
     return sl_client, id_to_image_url
 
 
+@st.cache_data(
+    ttl=settings.query_cache.ttl,
+    max_entries=settings.query_cache.max_entries,
+    show_spinner=False,
+)
+def query_hotels(_sl_client: SuperlinkedClient, natural_query: str, limit: int) -> dict:
+    # shared by all sessions, keyed by (natural_query, limit) - the client is excluded from the key
+    return _sl_client.query("hotel", {"natural_query": natural_query, "limit": limit})
+
+
+@st.cache_resource(show_spinner=False)
+def prefetch_kick_start_queries(_sl_client: SuperlinkedClient, limit: int) -> None:
+    """Warm the query cache with the kick start queries, once per process."""
+    ctx = get_script_run_ctx()
+
+    def prefetch(natural_query: str) -> None:
+        add_script_run_ctx(ctx=ctx)
+        try:
+            query_hotels(_sl_client, natural_query, limit)
+        except Exception as e:
+            logger.warning(f"Failed to prefetch query {natural_query!r}: {e}")
+
+    options = get_kick_start_options()
+    with ThreadPoolExecutor(max_workers=len(options)) as executor:
+        list(executor.map(prefetch, options))
+
+
 if "session_id" not in st.session_state:
     st.session_state.session_id = str(uuid.uuid4())
 
 
 sl_client, id_to_image_url = load_resources()
 
+if settings.query_cache.prefetch:
+    prefetch_kick_start_queries(sl_client, DEFAULT_LIMIT)
+
 # - - - Page header - - -
 
 st.title("Hotels search")
@@ -124,7 +158,7 @@ with col_query_text:
 with col_limit:
     st.write("**Limit**")
     limit = st.number_input(
-        "**Limit**", min_value=1, value=5, label_visibility="collapsed"
+        "**Limit**", min_value=1, value=DEFAULT_LIMIT, label_visibility="collapsed"
     )
     
 
@@ -150,8 +184,7 @@ with st.sidebar:
     st.markdown("### Query params")
     st.text("This are the query parameters that superlinked created from your natural language query")
 
-params = {"natural_query": text, "limit": limit}
-response = sl_client.query("hotel", params)
+response = query_hotels(sl_client, text, limit)
 response_flattened = flatten_response(response)
 knn_params = response["metadata"]["search_params"]
 
@@ -1 +1 @@
-from .superlinked_client import SuperlinkedClient
\ No newline at end of file
+from .superlinked_client import AsyncSuperlinkedClient, SuperlinkedClient
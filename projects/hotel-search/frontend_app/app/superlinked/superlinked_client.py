@@ -1,14 +1,31 @@
+import asyncio
 import requests
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Any
+from urllib3.util.retry import Retry
 import logging
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+RETRY_STATUSES = (502, 503, 504)
+RETRY_METHODS = frozenset({"GET", "POST"})
 
-class SuperlinkedClient:
-    def __init__(self, host: str | None = None, port: int | None = None):
+
+class BaseSuperlinkedClient:
+    def __init__(
+        self,
+        host: str | None = None,
+        port: int | None = None,
+        pool_size: int | None = None,
+        connect_timeout: float | None = None,
+        read_timeout: float | None = None,
+        max_retries: int | None = None,
+        backoff_factor: float | None = None,
+    ):
         if host is None:
             host = settings.server.api_host
         if port is None:
@@ -19,23 +36,94 @@ class SuperlinkedClient:
             "Content-Type": "application/json",
             "x-include-metadata": "true",
         }
+        self.pool_size = pool_size or settings.server.get("pool_size", 10)
+        self.connect_timeout = connect_timeout or settings.server.get("connect_timeout", 3.0)
+        self.read_timeout = read_timeout or settings.server.get("read_timeout", 30.0)
+        self.max_retries = settings.server.get("max_retries", 3) if max_retries is None else max_retries
+        self.backoff_factor = settings.server.get("backoff_factor", 0.5) if backoff_factor is None else backoff_factor
+        self.batch_size = settings.server.get("batch_size", 100)
+        self.batch_read_timeout = settings.server.get("batch_read_timeout", 300.0)
+
+    def _batches(self, items: list[dict[str, Any]]):
+        for start in range(0, len(items), self.batch_size):
+            yield items[start:start + self.batch_size]
+
+    @staticmethod
+    def _error(error: Exception) -> dict[str, Any]:
+        response = getattr(error, "response", None)
+        status_code = getattr(response, "status_code", None) or 500
+        return {"error": str(error), "status_code": status_code}
+
+
+class SuperlinkedClient(BaseSuperlinkedClient):
+    """Client of the Superlinked server, reusing keep-alive connections from a pooled session."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # read errors are never retried: the request may already have been applied (ingest)
+        # or be a slow LLM-backed query, re-sending it would only repeat the cost
+        retry = Retry(
+            total=self.max_retries,
+            read=False,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=RETRY_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.timeout = (self.connect_timeout, self.read_timeout)
+
+    def close(self):
+        self.session.close()
 
     def ingest(self, schema_name: str, data: dict[str, Any]):
         url = f"{self.base_url}/api/v1/ingest/{schema_name}"
-        response = requests.post(url, json=data, headers=self.headers)
+        response = self.session.post(url, json=data, timeout=self.timeout)
         if response.status_code != 202:
             response.raise_for_status()
 
     def query(self, query_name: str, data: dict[str, Any]) -> dict[str, Any]:
         url = f"{self.base_url}/api/v1/search/{query_name}"
-        response = requests.post(url, json=data, headers=self.headers)
+        response = self.session.post(url, json=data, timeout=self.timeout)
         if response.status_code != 200:
             response.raise_for_status()
         return response.json()
 
+    def query_batch(self, query_name: str, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Run many searches of a query, results are returned in order.
+        Uses the batch endpoint of the NLQ wrapper, against a plain Superlinked server
+        the searches are sent concurrently over the session pool instead.
+        Failed searches are returned as {"error", "status_code"}.
+        """
+        results = []
+        for batch in self._batches(items):
+            url = f"{self.base_url}/api/v1/search/{query_name}/batch"
+            response = self.session.post(url, json=batch, timeout=(self.connect_timeout, self.batch_read_timeout))
+            if response.status_code in (404, 405):
+                results.extend(self._query_concurrently(query_name, batch))
+                continue
+            response.raise_for_status()
+            results.extend(response.json())
+        return results
+
+    def _query_concurrently(self, query_name: str, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        def query_one(data: dict[str, Any]) -> dict[str, Any]:
+            try:
+                return self.query(query_name, data)
+            except requests.RequestException as e:
+                return self._error(e)
+
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            return list(executor.map(query_one, items))
+
     def get_data_loaders(self) -> list[str]:
         url = f"{self.base_url}/data-loader"
-        response = requests.get(url, headers=self.headers)
+        response = self.session.get(url, timeout=self.timeout)
         if response.status_code != 200:
             response.raise_for_status()
         result = list(response.json()["result"].keys())
@@ -43,7 +131,101 @@ class SuperlinkedClient:
 
     def run_data_loader(self, name: str):
         url = f"{self.base_url}/data-loader/{name}/run"
-        response = requests.post(url, headers=self.headers)
+        response = self.session.post(url, timeout=self.timeout)
+
+        if response.status_code == 409:
+            response_json = response.json()
+            info = response_json["result"]
+            assert info.startswith("Data load already running"), info
+            logger.warning(f"Data loader with name {name} already running")
+            return response_json
+
+        if response.status_code != 200:
+            response.raise_for_status()
+
+        return response.json()
+
+
+class AsyncSuperlinkedClient(BaseSuperlinkedClient):
+    """asyncio counterpart of `SuperlinkedClient`, backed by a pooled `httpx.AsyncClient`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+        )
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying connection failures and 502/503/504 responses with exponential backoff.
+        Read timeouts are not retried, like in `SuperlinkedClient`.
+        """
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = await self.client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    return response
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if last_attempt:
+                    raise
+            await asyncio.sleep(self.backoff_factor * 2**attempt)
+
+    async def ingest(self, schema_name: str, data: dict[str, Any]):
+        url = f"{self.base_url}/api/v1/ingest/{schema_name}"
+        response = await self._request("POST", url, json=data)
+        if response.status_code != 202:
+            response.raise_for_status()
+
+    async def query(self, query_name: str, data: dict[str, Any]) -> dict[str, Any]:
+        url = f"{self.base_url}/api/v1/search/{query_name}"
+        response = await self._request("POST", url, json=data)
+        if response.status_code != 200:
+            response.raise_for_status()
+        return response.json()
+
+    async def query_batch(self, query_name: str, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Async counterpart of `SuperlinkedClient.query_batch`."""
+        results = []
+        for batch in self._batches(items):
+            url = f"{self.base_url}/api/v1/search/{query_name}/batch"
+            response = await self._request(
+                "POST", url, json=batch, timeout=httpx.Timeout(self.batch_read_timeout, connect=self.connect_timeout)
+            )
+            if response.status_code in (404, 405):
+                results.extend(await self._query_concurrently(query_name, batch))
+                continue
+            response.raise_for_status()
+            results.extend(response.json())
+        return results
+
+    async def _query_concurrently(self, query_name: str, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.pool_size)
+
+        async def query_one(data: dict[str, Any]) -> dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await self.query(query_name, data)
+                except httpx.HTTPError as e:
+                    return self._error(e)
+
+        return await asyncio.gather(*[query_one(data) for data in items])
+
+    async def get_data_loaders(self) -> list[str]:
+        url = f"{self.base_url}/data-loader"
+        response = await self._request("GET", url)
+        if response.status_code != 200:
+            response.raise_for_status()
+        return list(response.json()["result"].keys())
+
+    async def run_data_loader(self, name: str):
+        url = f"{self.base_url}/data-loader/{name}/run"
+        response = await self._request("POST", url)
 
         if response.status_code == 409:
             response_json = response.json()
@@ -1,7 +1,7 @@
 from superlinked import framework as sl
 
 from superlinked_app.index import hotel_schema, index
-from superlinked_app.query import query, query_debug
+from superlinked_app.query import query, query_debug, query_structured
 from superlinked_app.config import settings
 
 rest_source_speech = sl.RestSource(hotel_schema)
@@ -26,6 +26,7 @@ executor = sl.RestExecutor(
     queries=[
         sl.RestQuery(sl.RestDescriptor("hotel"), query),
         sl.RestQuery(sl.RestDescriptor("hotel-debug"), query_debug),
+        sl.RestQuery(sl.RestDescriptor("hotel-structured"), query_structured),
     ],
     vector_database=vector_database,
 )
@@ -19,6 +19,11 @@ class Settings(BaseSettings):
     openai_api_key: SecretStr
     redis_vdb_host: str = "localhost"
     redis_vdb_port: str = "6379"
+    # query-time text embedding cache, see `embedding_cache.py`
+    embedding_cache_size: int = 10000
+    embedding_cache_path: str | None = None
+    embedding_cache_capacity: int = 100000
+    embedding_cache_log_every: int = 1000
     model_config = SettingsConfigDict(
         env_file=DEFAULT_ENV_FILENAME, env_file_encoding="utf-8"
     )
@@ -0,0 +1,241 @@
+import fcntl
+import functools
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+from superlinked_app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MemmapVectorStore:
+    """
+    Append-only store of float32 vectors in a memory-mapped file, shareable between processes.
+    Row keys are appended to `<path>.keys`, whose header line holds the vector dimension and capacity.
+    Rows are allocated under an exclusive lock on `<path>.lock`, a key is written only after its vector.
+    """
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        self.dim: int | None = None
+        self.vectors = None
+        self.rows: dict[str, int] = {}
+        self.n_rows = 0
+        self.disabled = False
+        self._keys_offset = 0
+        self._full_logged = False
+        if os.path.exists(f"{path}.keys") and os.path.getsize(f"{path}.keys") > 0:
+            with self._locked():
+                self._open()
+
+    @contextmanager
+    def _locked(self):
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _open(self, dim: int | None = None) -> None:
+        """Open the store, creating it with `dim` if it doesn't exist yet. Must hold the lock."""
+        keys_path = f"{self.path}.keys"
+        if not os.path.exists(keys_path) or os.path.getsize(keys_path) == 0:
+            with open(f"{self.path}.f32", "wb") as f:
+                f.truncate(self.capacity * dim * np.dtype(np.float32).itemsize)
+            with open(keys_path, "w") as f:
+                f.write(f"{dim} {self.capacity}\n")
+        with open(keys_path) as f:
+            header = f.readline()
+            self._keys_offset = f.tell()
+        self.dim, self.capacity = map(int, header.split())
+        self.vectors = np.memmap(f"{self.path}.f32", dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+        self._sync()
+
+    def _sync(self) -> None:
+        """Pick up the keys appended by other processes."""
+        keys_path = f"{self.path}.keys"
+        if os.path.getsize(keys_path) <= self._keys_offset:
+            return
+        with open(keys_path) as f:
+            f.seek(self._keys_offset)
+            for line in f:
+                # a partially written last line is read again by the next sync
+                if not line.endswith("\n"):
+                    break
+                self.rows.setdefault(line.rstrip("\n"), self.n_rows)
+                self.n_rows += 1
+                self._keys_offset += len(line.encode())
+
+    def _disable(self, reason: str) -> None:
+        logger.warning(f"Embedding store {self.path} is disabled: {reason}")
+        self.disabled = True
+
+    def get(self, key: str) -> np.ndarray | None:
+        if self.vectors is None and not self.disabled and os.path.exists(f"{self.path}.keys"):
+            # created by another process since
+            with self._locked():
+                if os.path.getsize(f"{self.path}.keys") > 0:
+                    self._open()
+        if self.disabled or self.vectors is None:
+            return None
+        if key not in self.rows:
+            self._sync()
+        row = self.rows.get(key)
+        return None if row is None else np.array(self.vectors[row])
+
+    def add(self, key: str, vector: np.ndarray) -> None:
+        if self.disabled:
+            return
+        with self._locked():
+            if self.vectors is None:
+                self._open(dim=len(vector))
+            if len(vector) != self.dim:
+                self._disable(f"it holds {self.dim}-dimensional vectors, got {len(vector)}")
+                return
+            self._sync()
+            if key in self.rows:
+                return
+            row = self.n_rows
+            if row >= self.capacity:
+                if not self._full_logged:
+                    logger.warning(f"Embedding store {self.path} is full ({self.capacity} vectors)")
+                    self._full_logged = True
+                return
+            self.vectors[row] = vector
+            self.vectors.flush()
+            with open(f"{self.path}.keys", "a") as f:
+                f.write(f"{key}\n")
+            self._sync()
+
+
+class EmbeddingCache:
+    """
+    Query-time text embeddings keyed by a content hash of the model and the text.
+    An in-memory LRU is backed by an optional memory-mapped store shared between processes and restarts.
+    """
+
+    def __init__(self, maxsize: int = 10000, store: MemmapVectorStore | None = None, log_every: int = 1000):
+        self.maxsize = maxsize
+        self.store = store
+        self.log_every = log_every
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._data: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        return hashlib.sha256(repr((model_name, text)).encode()).hexdigest()
+
+    def get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            vector = self._data.get(key)
+            if vector is not None:
+                self._data.move_to_end(key)
+                self._count("hits")
+                return vector
+            if self.store is not None and (vector := self.store.get(key)) is not None:
+                self._set_memory(key, vector)
+                self._count("disk_hits")
+                return vector
+            self._count("misses")
+            return None
+
+    def set(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._set_memory(key, vector)
+            if self.store is not None:
+                self.store.add(key, vector)
+
+    def _set_memory(self, key: str, vector: np.ndarray) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = vector
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def _count(self, counter: str) -> None:
+        self.counters[counter] += 1
+        if self.log_every and sum(self.counters.values()) % self.log_every == 0:
+            logger.info(f"Query embedding cache: {self.stats()}")
+
+    def stats(self) -> dict:
+        hits = self.counters["hits"] + self.counters["disk_hits"]
+        total = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "size": len(self._data),
+            "stored": len(self.store.rows) if self.store is not None else 0,
+            "hit_ratio": hits / total if total else 0.0,
+        }
+
+
+_embedding_cache: EmbeddingCache | None = None
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    return _embedding_cache
+
+
+def store_path(path: str, model_name: str) -> str:
+    """Store path of a model, so vectors of different models never share a file."""
+    return path + "-" + re.sub(r"[^\w.-]+", "_", model_name)
+
+
+def install_embedding_cache() -> EmbeddingCache | None:
+    """
+    Cache the sentence-transformers embeddings computed in query context, ingestion always embeds directly.
+    Cache failures are logged and fall back to embedding without the cache.
+    """
+    global _embedding_cache
+    if _embedding_cache is not None or settings.embedding_cache_size <= 0:
+        return _embedding_cache
+    try:
+        from superlinked.framework.common.space.embedding.sentence_transformer_manager import (
+            SentenceTransformerManager,
+        )
+    except ImportError:
+        logger.warning("superlinked sentence-transformers support is missing, the query embedding cache is disabled")
+        return None
+
+    store = None
+    if settings.embedding_cache_path:
+        path = store_path(settings.embedding_cache_path, settings.text_embedder_name)
+        store = MemmapVectorStore(path, settings.embedding_cache_capacity)
+    cache = EmbeddingCache(settings.embedding_cache_size, store, settings.embedding_cache_log_every)
+    embed = SentenceTransformerManager._embed
+
+    @functools.wraps(embed)
+    def cached_embed(self, inputs, context):
+        if not context.is_query_context or not all(isinstance(text, str) for text in inputs):
+            return embed(self, inputs, context)
+        try:
+            keys = [cache.make_key(self._model_name, text) for text in inputs]
+            vectors = [cache.get(key) for key in keys]
+        except Exception:
+            logger.exception("Query embedding cache lookup failed")
+            return embed(self, inputs, context)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embeddings = np.asarray(embed(self, [inputs[i] for i in missing], context), dtype=np.float32)
+            for i, embedding in zip(missing, embeddings):
+                vectors[i] = embedding
+                try:
+                    cache.set(keys[i], embedding)
+                except Exception:
+                    logger.exception("Query embedding cache update failed")
+        return [vector.tolist() for vector in vectors]
+
+    SentenceTransformerManager._embed = cached_embed
+    _embedding_cache = cache
+    logger.info(f"Query embedding cache installed (size={cache.maxsize}, store={store.path if store else None})")
+    return cache
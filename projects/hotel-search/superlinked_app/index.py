@@ -1,6 +1,10 @@
 from superlinked import framework as sl
 
 from superlinked_app.config import settings
+from superlinked_app.embedding_cache import install_embedding_cache
+
+# query descriptions repeat a lot, their embeddings are cached by content hash
+install_embedding_cache()
 
 
 @sl.schema
@@ -200,6 +200,10 @@ for filter_item in filters:
     )
     query = query.filter(filter_item.operator(param))
 
+# The query without natural language interface accepts the parameters directly,
+# e.g. the ones previously suggested by LLM for the same natural query.
+query_structured = query
+
 # And finally, let's add natural language interface on top
 # that will call LLM to parse user natural query
 # into structured superlinked query, i.e. suggest parameters values.
@@ -0,0 +1,33 @@
+import os
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+DEFAULT_ENV_FILENAME = ".env"
+
+
+class Settings(BaseSettings):
+    superlinked_url: str = "http://localhost:8080"
+    superlinked_timeout: float = 30.0
+    superlinked_pool_size: int = 20
+    # natural query -> search params cache: in-memory size, optional sqlite file and ttl in seconds (0 = no expiry)
+    nlq_cache_size: int = 10000
+    nlq_cache_path: str | None = None
+    nlq_cache_ttl: int = 0
+    # rule based parsing of simple natural queries, used when it explains this share of the query words
+    nlq_rules_enabled: bool = True
+    nlq_rules_min_confidence: float = 1.0
+    # searches of a batch request running at the same time
+    batch_concurrency: int = 8
+    model_config = SettingsConfigDict(
+        env_file=DEFAULT_ENV_FILENAME, env_file_encoding="utf-8"
+    )
+
+
+def get_env_file_path() -> str:
+    dirname = os.path.dirname(__file__)
+    rel_path = os.path.join(dirname, DEFAULT_ENV_FILENAME)
+    abs_path = os.path.abspath(rel_path)
+    return abs_path
+
+
+settings = Settings(_env_file=get_env_file_path())
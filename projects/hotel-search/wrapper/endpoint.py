@@ -0,0 +1,209 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+from superlinked_app.config import settings as sl_settings
+from superlinked_app.nlq import (
+    city_description,
+    description_description,
+    get_cat_options,
+    price_description,
+    rating_count_description,
+    rating_description,
+    system_prompt,
+)
+from wrapper.config import settings
+from wrapper.nlq_cache import NLQCache, fingerprint
+from wrapper.nlq_rules import RuleExtractor, load_rule_extractor
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+NLQ_QUERIES = {
+    # natural language query -> the same query accepting the suggested params directly
+    "hotel": "hotel-structured",
+}
+# params added by the natural language interface, they are not params of the structured query
+NLQ_INTERNAL_PARAMS = {"natural_query", "system_prompt_param__", "select_param__", "limit"}
+SL_HEADERS = {
+    "Accept": "*/*",
+    "Content-Type": "application/json",
+    "x-include-metadata": "true",
+}
+
+
+class AppState:
+    sl_client: httpx.AsyncClient
+    nlq_cache: NLQCache
+    nlq_fingerprint: str
+    rule_extractor: RuleExtractor | None
+    nlq_counters: dict[str, int]
+
+
+app_state = AppState()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app_state.sl_client = httpx.AsyncClient(
+        base_url=settings.superlinked_url,
+        headers=SL_HEADERS,
+        timeout=settings.superlinked_timeout,
+        limits=httpx.Limits(
+            max_connections=settings.superlinked_pool_size,
+            max_keepalive_connections=settings.superlinked_pool_size,
+        ),
+    )
+    app_state.nlq_cache = NLQCache(
+        maxsize=settings.nlq_cache_size,
+        path=settings.nlq_cache_path,
+        ttl=settings.nlq_cache_ttl,
+    )
+    # cached params are only valid for the prompts, options and model that produced them
+    app_state.nlq_fingerprint = fingerprint(
+        system_prompt,
+        description_description,
+        city_description,
+        price_description,
+        rating_description,
+        rating_count_description,
+        get_cat_options(),
+        sl_settings.openai_model,
+    )
+    logger.info(f"NLQ cache fingerprint: {app_state.nlq_fingerprint}")
+    app_state.rule_extractor = load_rule_extractor() if settings.nlq_rules_enabled else None
+    app_state.nlq_counters = {"rules": 0, "cache_or_llm": 0}
+    yield
+    await app_state.sl_client.aclose()
+    app_state.nlq_cache.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+async def call_superlinked(method: str, path: str, **kwargs) -> httpx.Response:
+    return await app_state.sl_client.request(method, path, **kwargs)
+
+
+def to_response(sl_response: httpx.Response) -> Response:
+    return Response(
+        content=sl_response.content,
+        status_code=sl_response.status_code,
+        media_type=sl_response.headers.get("content-type"),
+    )
+
+
+def clean_search_params(search_params: dict[str, Any]) -> dict[str, Any]:
+    """Params suggested by the LLM that can be replayed into the structured query."""
+    return {
+        key: value
+        for key, value in search_params.items()
+        if value is not None and key not in NLQ_INTERNAL_PARAMS
+    }
+
+
+async def search_natural_query(query_name: str, data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Serve a natural language query without an LLM call when the rule extractor is confident,
+    otherwise pay for the LLM call only on the first occurrence of the query.
+    Rule and cached params are replayed into the structured query.
+    """
+    natural_query = data["natural_query"]
+    extra_params = {key: value for key, value in data.items() if key not in ("natural_query", "limit")}
+
+    if app_state.rule_extractor is not None:
+        extraction = app_state.rule_extractor.extract(natural_query)
+        if extraction.confidence >= settings.nlq_rules_min_confidence:
+            app_state.nlq_counters["rules"] += 1
+            return await search_structured(query_name, natural_query, extraction.params, data)
+    app_state.nlq_counters["cache_or_llm"] += 1
+
+    key = app_state.nlq_cache.make_key(
+        f"{query_name}:{app_state.nlq_fingerprint}", natural_query, extra_params
+    )
+
+    async def parse_with_llm():
+        sl_response = await call_superlinked("POST", f"/api/v1/search/{query_name}", json=data)
+        sl_response.raise_for_status()
+        result = sl_response.json()
+        return clean_search_params(result["metadata"]["search_params"]), result
+
+    params, result = await app_state.nlq_cache.get_or_compute(key, parse_with_llm)
+    if result is not None:
+        return result
+    return await search_structured(query_name, natural_query, params, data)
+
+
+async def search_structured(
+    query_name: str, natural_query: str, params: dict[str, Any], data: dict[str, Any]
+) -> dict[str, Any]:
+    """Run the structured counterpart of a natural language query with already parsed params."""
+    structured_data = {**params, **{key: value for key, value in data.items() if key != "natural_query"}}
+    sl_response = await call_superlinked(
+        "POST", f"/api/v1/search/{NLQ_QUERIES[query_name]}", json=structured_data
+    )
+    sl_response.raise_for_status()
+    result = sl_response.json()
+    # keep the response compatible with the natural language query one
+    result["metadata"]["search_params"] = {**result["metadata"].get("search_params", {}), "natural_query": natural_query}
+    return result
+
+
+async def run_search(query_name: str, data: dict[str, Any]) -> dict[str, Any]:
+    """Search result of a query, raises `httpx.HTTPStatusError` when the server fails."""
+    if query_name in NLQ_QUERIES and data.get("natural_query"):
+        return await search_natural_query(query_name, data)
+    sl_response = await call_superlinked("POST", f"/api/v1/search/{query_name}", json=data)
+    sl_response.raise_for_status()
+    return sl_response.json()
+
+
+@app.post("/api/v1/search/{query_name}")
+async def search(query_name: str, request: Request):
+    """Drop-in replacement of the Superlinked search endpoint with cached natural query parsing."""
+    data = await request.json()
+    if query_name not in NLQ_QUERIES or not data.get("natural_query"):
+        return to_response(await call_superlinked("POST", f"/api/v1/search/{query_name}", json=data))
+    try:
+        return JSONResponse(await search_natural_query(query_name, data))
+    except httpx.HTTPStatusError as e:
+        return to_response(e.response)
+
+
+@app.post("/api/v1/search/{query_name}/batch")
+async def search_batch(query_name: str, queries: list[dict[str, Any]]):
+    """
+    Run many searches of the same query, e.g. a replay of logged natural queries.
+    Identical requests run once, at most `batch_concurrency` run at a time.
+    Results are returned in the request order, failed searches as {"error", "status_code"}.
+    """
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+
+    async def run_one(data: dict[str, Any]) -> dict[str, Any]:
+        async with semaphore:
+            try:
+                return await run_search(query_name, data)
+            except httpx.HTTPStatusError as e:
+                return {"error": e.response.text, "status_code": e.response.status_code}
+            except Exception as e:
+                logger.error(f"Batch search failed for {data}: {e}")
+                return {"error": str(e), "status_code": 500}
+
+    unique = {json.dumps(data, sort_keys=True): data for data in queries}
+    results = dict(zip(unique, await asyncio.gather(*[run_one(data) for data in unique.values()])))
+    return [results[json.dumps(data, sort_keys=True)] for data in queries]
+
+
+@app.get("/api/v1/nlq-cache/stats")
+async def nlq_cache_stats():
+    return {
+        "fingerprint": app_state.nlq_fingerprint,
+        **app_state.nlq_cache.stats(),
+        "queries": app_state.nlq_counters,
+    }
@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(natural_query: str) -> str:
+    """Normalize a natural query so that trivially different spellings share a cache entry."""
+    text = unicodedata.normalize("NFKC", natural_query).casefold()
+    return re.sub(r"\s+", " ", text).strip(" .!?")
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable hash of everything the LLM output depends on (prompts, options, model)."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class NLQCache:
+    """
+    Cache of search params suggested by the LLM for natural queries.
+    An in-memory LRU is backed by an optional SQLite file shared between restarts and workers.
+    Concurrent misses for the same key share a single LLM call.
+    """
+
+    def __init__(self, maxsize: int = 10000, path: str | None = None, ttl: int = 0):
+        self.maxsize = maxsize
+        self.path = path
+        self.ttl = ttl
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._data: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS nlq_cache (key TEXT PRIMARY KEY, params TEXT, created_at REAL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(namespace: str, natural_query: str, extra_params: dict[str, Any]) -> str:
+        extra = json.dumps(extra_params, sort_keys=True, default=str) if extra_params else ""
+        return f"{namespace}:{normalize_query(natural_query)}:{extra}"
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and created_at + self.ttl < time.time()
+
+    def _get_memory(self, key: str) -> dict | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if self._expired(item[0]):
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return item[1]
+
+    def _set_memory(self, key: str, params: dict, created_at: float) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (created_at, params)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def _get_disk(self, key: str) -> tuple[float, dict] | None:
+        row = self._db.execute("SELECT params, created_at FROM nlq_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or self._expired(row[1]):
+            return None
+        return row[1], json.loads(row[0])
+
+    def _set_disk(self, key: str, params: dict, created_at: float) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO nlq_cache (key, params, created_at) VALUES (?, ?, ?)",
+            (key, json.dumps(params), created_at),
+        )
+        self._db.commit()
+
+    async def get(self, key: str) -> dict | None:
+        params = self._get_memory(key)
+        if params is not None:
+            self.counters["hits"] += 1
+            return params
+        if self._db is not None:
+            item = await asyncio.to_thread(self._get_disk, key)
+            if item is not None:
+                self.counters["disk_hits"] += 1
+                self._set_memory(key, item[1], item[0])
+                return item[1]
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, params: dict) -> None:
+        created_at = time.time()
+        self._set_memory(key, params, created_at)
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._set_disk, key, params, created_at)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to persist NLQ cache entry: {e}")
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[tuple[dict, Any]]]) -> tuple[dict, Any]:
+        """
+        Return `(params, None)` when the key is cached.
+        Otherwise await `compute()`, which returns `(params, result)`, cache the params and return both.
+        Concurrent callers of a missing key wait for the same computation.
+        """
+        params = await self.get(key)
+        if params is not None:
+            return params, None
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(compute())
+            self._inflight[key] = future
+            try:
+                params, result = await asyncio.shield(future)
+            finally:
+                self._inflight.pop(key, None)
+            await self.set(key, params)
+            return params, result
+        # the result of the leader is its own response, followers replay the params
+        params, _ = await asyncio.shield(future)
+        return params, None
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+
+    def stats(self) -> dict[str, Any]:
+        hits = self.counters["hits"] + self.counters["disk_hits"]
+        total = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "persistent": self._db is not None,
+            "hit_rate": hits / total if total else 0.0,
+        }
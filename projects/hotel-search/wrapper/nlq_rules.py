@@ -0,0 +1,330 @@
+"""
+Rule and lexicon based extraction of hotel search params from natural queries.
+
+Handles the common short queries ("Best hotels in Berlin", "cheap hotels in London, no pets")
+without an LLM call: cities come from the dataset, weights from the phrases listed in the
+param descriptions of `nlq.py`, accomodation types and amenities from `cat_options`.
+Queries with words the rules can't explain are left to the LLM.
+
+Offline benchmark against logged LLM outputs of the frontend:
+    python -m wrapper.nlq_rules frontend_app/logs/*.jsonl
+"""
+
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import pandas as pd
+
+from superlinked_app.config import settings as sl_settings
+from superlinked_app.nlq import get_cat_options, price_description, rating_count_description, rating_description
+
+WEIGHT_PARAMS = ("price_weight", "rating_weight", "rating_count_weight")
+AMENITY_CATEGORIES = ("property_amenities", "room_amenities", "wellness_spa", "accessibility", "for_children")
+
+# common phrasings missing from the examples of the param descriptions
+EXTRA_WEIGHT_PHRASES = {
+    "price_weight": (
+        ["luxury", "posh", "upscale", "pricey", "premium"],
+        ["cheapest", "budget", "inexpensive", "low cost", "economical", "low budget"],
+    ),
+    "rating_weight": (
+        ["highly rated", "well rated", "top rated", "best rated", "great", "excellent", "good rating"],
+        ["badly rated", "worst rated", "bad"],
+    ),
+    "rating_count_weight": (
+        ["lots of reviews", "a lot of reviews", "well known"],
+        ["not many reviews", "unknown", "hidden gem"],
+    ),
+}
+# words that never need the description space
+FILLER_WORDS = {
+    "a", "an", "the", "in", "at", "of", "for", "with", "and", "or", "but", "to", "near", "me",
+    "some", "any", "very", "really", "most", "more", "highly", "quite", "please", "find", "show",
+    "looking", "i", "want", "need", "search", "options", "option", "place", "places", "stay", "city",
+    "that", "which", "is", "are", "has", "have", "also", "free",
+}
+NEGATIONS = {"no", "not", "without", "non"}
+# "and"/"but" join requirements, which the params express; "or" asks for alternatives, which they can't
+CONJUNCTIONS = {"and", "but"}
+DISJUNCTIONS = {"or"}
+# a city name must follow one of these or be capitalized mid-query, so "Nice hotels in Paris" doesn't mean Nice
+CITY_PREPOSITIONS = {"in", "near", "at", "around", "to"}
+# amenity synonyms, mapped only when the target option exists in cat_options
+AMENITY_ALIASES = {
+    "baby": "Cot",
+    "babies": "Cot",
+    "infant": "Cot",
+    "children": "Cot",
+    "child": "Cot",
+    "kids": "Cot",
+    "pets": "Pets allowed",
+    "pet": "Pets allowed",
+    "pet friendly": "Pets allowed",
+    "dog friendly": "Pets allowed",
+    "dogs": "Pets allowed",
+    "wifi": "Free WiFi",
+    "parking": "Free parking",
+    "pool": "Swimming pool",
+    "gym": "Fitness centre",
+    "spa": "Spa and wellness centre",
+}
+
+
+def tokenize(text: str, casefold: bool = True) -> list[str]:
+    tokens = re.findall(r"[\w']+", text.replace("-", " "))
+    return [token.casefold() for token in tokens] if casefold else tokens
+
+
+def parse_weight_phrases(description: str) -> tuple[list[str], list[str]]:
+    """Positive and negative example phrases listed in a weight param description."""
+    positive = re.search(r"positive weight:(.*?);", description)
+    negative = re.search(r"negative weight:(.*?);", description)
+    return (
+        re.findall(r"'([^']+)'", positive.group(1)) if positive else [],
+        re.findall(r"'([^']+)'", negative.group(1)) if negative else [],
+    )
+
+
+@dataclass
+class Extraction:
+    params: dict[str, Any]
+    leftover: list[str] = field(default_factory=list)
+    n_words: int = 0
+
+    @property
+    def confidence(self) -> float:
+        """Share of the query content words explained by the rules."""
+        return 1.0 - len(self.leftover) / self.n_words if self.n_words else 1.0
+
+
+class RuleExtractor:
+    def __init__(self, cat_options: dict[str, list[str]], cities: list[str], weight_descriptions: dict[str, str]):
+        # phrase (as a token tuple) -> list of (kind, target, value)
+        self.phrases: dict[tuple[str, ...], list[tuple[str, str, Any]]] = {}
+        for city in cities:
+            self._add(city, "city", "city", city)
+        for param_name, description in weight_descriptions.items():
+            positive, negative = parse_weight_phrases(description)
+            extra_positive, extra_negative = EXTRA_WEIGHT_PHRASES.get(param_name, ([], []))
+            for phrase in positive + extra_positive:
+                self._add(phrase, "weight", param_name, 1.0)
+            for phrase in negative + extra_negative:
+                self._add(phrase, "weight", param_name, -1.0)
+        for option in cat_options.get("accomodation_type", []):
+            self._add(option, "accomodation_type", "accomodation_type", option)
+            self._add(option + "s", "accomodation_type", "accomodation_type", option)
+        option_categories = {}
+        for category in AMENITY_CATEGORIES:
+            for option in cat_options.get(category, []):
+                option_categories.setdefault(option, category)
+                self._add(option, "amenity", category, option)
+        for alias, option in AMENITY_ALIASES.items():
+            if option in option_categories:
+                self._add(alias, "amenity", option_categories[option], option)
+        self.max_phrase_len = max((len(phrase) for phrase in self.phrases), default=1)
+
+    def _add(self, phrase: str, kind: str, target: str, value: Any) -> None:
+        tokens = tuple(tokenize(phrase))
+        if tokens and (kind, target, value) not in self.phrases.get(tokens, []):
+            self.phrases.setdefault(tokens, []).append((kind, target, value))
+
+    def extract(self, natural_query: str) -> Extraction:
+        raw_tokens = tokenize(natural_query, casefold=False)
+        tokens = [token.casefold() for token in raw_tokens]
+        params: dict[str, Any] = {param_name: 0.0 for param_name in WEIGHT_PARAMS}
+        params["description_weight"] = 1.0
+        accomodation_types: list[str] = []
+        amenities: dict[str, dict[str, list[str]]] = {}
+        accomodation_excludes: list[str] = []
+        leftover = []
+        # a negation waits for the next phrase, through filler words ("not the cheapest")
+        negation = None
+        # the previous phrase was an excluded amenity, "no pets and kids" is ambiguous
+        after_exclude = False
+        i = 0
+        while i < len(tokens):
+            city_allowed = i > 0 and (raw_tokens[i][:1].isupper() or tokens[i - 1] in CITY_PREPOSITIONS)
+            # longest phrase first, so "not expensive" wins over "expensive"
+            for length in range(min(self.max_phrase_len, len(tokens) - i), 0, -1):
+                matches = [
+                    match for match in self.phrases.get(tuple(tokens[i:i + length]), [])
+                    if match[0] != "city" or city_allowed
+                ]
+                if matches:
+                    break
+            else:
+                if tokens[i] in NEGATIONS:
+                    if negation is not None:
+                        leftover.append(negation)
+                    negation = tokens[i]
+                elif tokens[i] in DISJUNCTIONS or (tokens[i] in CONJUNCTIONS and after_exclude):
+                    leftover.append(tokens[i])
+                elif tokens[i] not in FILLER_WORDS and tokens[i] not in CONJUNCTIONS:
+                    leftover.append(tokens[i])
+                i += 1
+                continue
+            negated = negation is not None
+            # only amenities and accomodation types can be excluded, other negated phrases are left to the LLM
+            if negated and not all(kind in ("amenity", "accomodation_type") for kind, _, _ in matches):
+                leftover.append(negation)
+                negated = False
+            negation = None
+            after_exclude = negated
+            for kind, target, value in matches:
+                if kind == "city":
+                    if params.setdefault("city", value) != value:
+                        # a single city param can't hold "London or Paris"
+                        leftover.append(value.casefold())
+                elif kind == "weight":
+                    params[target] = value
+                elif kind == "accomodation_type":
+                    types = accomodation_excludes if negated else accomodation_types
+                    if value not in types:
+                        types.append(value)
+                elif kind == "amenity":
+                    options = amenities.setdefault(target, {}).setdefault("exclude" if negated else "include_all", [])
+                    if value not in options:
+                        options.append(value)
+            i += length
+        if negation is not None:
+            leftover.append(negation)
+
+        if accomodation_types:
+            params["accomodation_types_include"] = (
+                accomodation_types[0] if len(accomodation_types) == 1 else accomodation_types
+            )
+        if accomodation_excludes:
+            params["accomodation_types_exclude"] = accomodation_excludes
+        for category, operators in amenities.items():
+            for operator, options in operators.items():
+                params[f"{category}_{operator}"] = options
+        # everything is captured by the structured params, like the empty description examples of nlq.py
+        params["description"] = ""
+        n_words = sum(token not in FILLER_WORDS and token not in CONJUNCTIONS for token in tokens)
+        return Extraction(params=params, leftover=leftover, n_words=n_words)
+
+
+def compare(rule_params: dict[str, Any], llm_params: dict[str, Any]) -> dict[str, bool]:
+    """Per-field agreement of rule and LLM params: weight signs, city, types and amenity sets."""
+
+    def as_set(value):
+        if value is None:
+            return set()
+        return {value} if isinstance(value, str) else set(value)
+
+    def sign(value):
+        value = value or 0.0
+        return (value > 0) - (value < 0)
+
+    agreement = {name: sign(rule_params.get(name)) == sign(llm_params.get(name)) for name in WEIGHT_PARAMS}
+    agreement["city"] = (rule_params.get("city") or None) == (llm_params.get("city") or None)
+    list_params = {"accomodation_types_include", "accomodation_types_exclude"} | {
+        f"{category}_{operator}"
+        for category in AMENITY_CATEGORIES
+        for operator in ("include_all", "include_any", "exclude")
+    }
+    for name in sorted(list_params):
+        agreement[name] = as_set(rule_params.get(name)) == as_set(llm_params.get(name))
+    # amenities asked for may be put into include_all or include_any by the LLM
+    for category in AMENITY_CATEGORIES:
+        rule_include = as_set(rule_params.get(f"{category}_include_all")) | as_set(rule_params.get(f"{category}_include_any"))
+        llm_include = as_set(llm_params.get(f"{category}_include_all")) | as_set(llm_params.get(f"{category}_include_any"))
+        agreement[f"{category}_include_all"] = agreement[f"{category}_include_any"] = rule_include == llm_include
+    agreement["description"] = not llm_params.get("description")
+    return agreement
+
+
+# queries the rules once got wrong at full confidence: None means they must be left to the LLM,
+# otherwise the params that must hold when the rules are confident
+REGRESSION_QUERIES: list[tuple[str, dict[str, Any] | None]] = [
+    ("not luxury hotels in Rome", None),
+    ("not good hotels in Paris", None),
+    ("hotel in Berlin, not the cheapest", None),
+    ("hotels in London or Paris", None),
+    ("Nice hotels in Paris", {"city": "Paris"}),
+    ("without pool or gym", None),
+    ("no pets and kids, hotel in London", None),
+    ("Cheap hotels in London", {"price_weight": -1.0, "city": "London"}),
+    ("not expensive hotels in Paris", {"price_weight": -1.0, "city": "Paris"}),
+    ("hotels in Berlin, no pets", {"city": "Berlin", "property_amenities_exclude": ["Pets allowed"]}),
+]
+
+
+def check_regressions(extractor: RuleExtractor, min_confidence: float) -> list[str]:
+    """Regression queries the extractor gets wrong at `min_confidence`."""
+    failures = []
+    for natural_query, expected in REGRESSION_QUERIES:
+        extraction = extractor.extract(natural_query)
+        if extraction.confidence < min_confidence:
+            continue
+        if expected is None or any(extraction.params.get(name) != value for name, value in expected.items()):
+            failures.append(natural_query)
+    return failures
+
+
+def read_logged_queries(paths: list[str]) -> list[tuple[str, dict[str, Any]]]:
+    """(natural_query, LLM search params) pairs logged by the frontend, as JSONL records."""
+    queries = {}
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                message = json.loads(line).get("message")
+                if isinstance(message, dict) and message.get("natural_query") and message.get("params"):
+                    queries[message["natural_query"]] = message["params"]
+    return list(queries.items())
+
+
+def benchmark(extractor: RuleExtractor, queries: list[tuple[str, dict[str, Any]]], min_confidence: float) -> dict[str, Any]:
+    latencies = []
+    n_confident = n_exact = 0
+    field_agreement: dict[str, int] = {}
+    for natural_query, llm_params in queries:
+        started = time.perf_counter()
+        extraction = extractor.extract(natural_query)
+        latencies.append(time.perf_counter() - started)
+        if extraction.confidence < min_confidence:
+            continue
+        n_confident += 1
+        agreement = compare(extraction.params, llm_params)
+        n_exact += all(agreement.values())
+        for name, agree in agreement.items():
+            field_agreement[name] = field_agreement.get(name, 0) + agree
+    latencies.sort()
+    n = len(queries)
+    return {
+        "queries": n,
+        "coverage": n_confident / n if n else 0.0,
+        "exact_agreement": n_exact / n_confident if n_confident else 0.0,
+        "field_agreement": {name: count / n_confident for name, count in sorted(field_agreement.items())},
+        "latency_p50_us": latencies[n // 2] * 1e6 if n else 0.0,
+        "latency_p99_us": latencies[min(n - 1, int(n * 0.99))] * 1e6 if n else 0.0,
+        "regression_failures": check_regressions(extractor, min_confidence),
+    }
+
+
+def load_rule_extractor() -> RuleExtractor:
+    """Rule extractor built from the category options, dataset cities and param descriptions of the app."""
+    cities = pd.read_json(sl_settings.path_dataset, lines=True)["city"].dropna().unique().tolist()
+    return RuleExtractor(
+        cat_options=get_cat_options(),
+        cities=cities,
+        weight_descriptions={
+            "price_weight": price_description,
+            "rating_weight": rating_description,
+            "rating_count_weight": rating_count_description,
+        },
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Agreement and latency of the rule extractor against logged LLM params")
+    parser.add_argument("logs", nargs="+", help="frontend JSONL log files")
+    parser.add_argument("--min-confidence", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(json.dumps(benchmark(load_rule_extractor(), read_logged_queries(args.logs), args.min_confidence), indent=2))